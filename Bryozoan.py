@@ -15,33 +15,86 @@ colonyplot: plot conductivities of internal edges (lines) and edges to outside
     (dots); overlays with plot of flow to outside (stars) and (arrows) flow
     between nodes
 setouterconductivities : Modify conductivity of inner node-to-outside edges.
+setconductivities : Modify conductivities of inner or outflow edges
+    (vectorized; indices, masks or regions from selectnodes/selectedges)
+selectnodes, selectedges : Boolean masks of nodes or edges in a region (row
+    or column bands, or a disc around a node)
+freezeconduits : Hold conductivities of chosen edges fixed during integration
+addinflow : Add a component to inflow that varies over time (schedule) and
+    among nodes (profile)
+dropout : Stop pumping at chosen nodes during a time window (repeating if
+    periodic)
+clearinflow : Remove time-varying inflow components
+inflowat : Inflow into each node at given time
+pressuresat : Pressures at many times, from one factorization
 solvecolony : Solve for pressures, dC/dt, and flow within network (given
     incurrent flows into nodes)
 IntegrateColony : Solves differential equations based on dC/dt set in __init__.
 OutflowFraction : returns a measure of how much a node functions as a chimney
+flowintensity : Flow through each node (for comparison with flow images)
 develop : Create new colony object with conductivities updated by integration
     of ODE
+grow : Add zooid rows at the distal (growing) edge of the colony
+growdevelop : Create new colony object that alternately develops and grows
+coarsen : Create coarser colony (blocks of zooids combined) from this one
+prolong : Set conductivities from a (developed) coarse colony
+developmultires : Create new colony object developed from an initial
+    condition developed on a coarser lattice
+save : Save colony (and optionally an ontogeny) in compact on-disk format
+copy : Copy colony state, sharing the (immutable) topology
+animate : Render an ontogeny frame by frame to a video or image sequence
 
 ATTRIBUTES OF COLONY OBJECTS:
  'Adjacency',
+ 'Degree',
  'InFlow',
+ 'InFlowGains',
+ 'InFlowProfiles',
  'Incidence',
+ 'IntegrationStats',
+ 'InnerAge',
  'InnerConduits',
+ 'InnerFrozen',
  'Laplacian',
+ 'OutflowAge',
  'OutflowConduits',
+ 'OutflowFrozen',
  'UpperAdjacency'
  'colinds',
+ 'dCdt'
+ 'dCdt_in_params'
  'dCdt_inner'
+ 'dCdt_out_params'
  'dCdt_outer'
  'm',
  'n',
  'rowinds',
+ 'time',
+ 'topology',
+ 'version',
  'xs',
  'ys',
  'ysjig'
 
+OTHER CLASSES
+ColonyTopology : Lattice (coordinates, edges, sparse matrices) shared among
+    colonies of the same size
+ColonyArtist : Plot of colony conductivities and flows that can be updated
+    cheaply (used by colonyplot and animate)
+DevelopCache : On-disk cache of develop results, keyed by experiment hash
+FlowImage : Flow intensity from a processed flow image, sampled on colony
+    lattices and scored against model flows
+
 Other functions
 dCdt_default : Default function for calculating dConductivity/dt
+dCdt_asymmetric : dConductivity/dt with separate rates for growing and
+    shrinking conduits that change with conduit age
+registerdCdt : Register a dC/dt function by name (for saving colonies)
+inflowgain_constant, inflowgain_periodic, inflowgain_window : Schedules for
+    time-varying inflow (see Colony.addinflow)
+loadcolony : Load colony saved by Colony.save
+loadsnapshot : Load arrays of saved colony (memory-mapped) without a Colony
+loadtrajectory : Load ontogeny saved by Colony.save
 
 DESIRED FEATURES:
 1) Methods to do the following:
@@ -52,7 +105,7 @@ x1.2 Punch a hole in the colony (locally modify the conductivities, and keep
     them fixed).
 x1.3 Assess the pattern (e.g. it's stability, chimneyishness, or aspects of
     performance)
-1.4 Grow the colony
+x1.4 Grow the colony
 1.5 To speed up search through parameter space, define a function to assess
     whether a parameter set is satisfactory based on dConductivity/dt at a
     specific initial condition.
@@ -64,7 +117,7 @@ edges sharing vertices with a given edge (will need to add incidence matrix as
 an input: change __init__ and solvecolony too; should end up being something
 like: Incidence*transpose(Incidence))
 
-3) Asymmetry in flow response and aging (so zooids can respond differently to
+x3) Asymmetry in flow response and aging (so zooids can respond differently to
 increased vs decreased flow, and old zooids respond differently than young
 ones)
 
@@ -96,10 +149,20 @@ get_ipython().magic('reset -sf')
 import matplotlib.pyplot as plt
 import numpy as np
 import copy
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 import time
+import weakref
 import scipy.sparse as sparse  # Sparse matrix library
+from matplotlib.animation import FFMpegWriter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.collections import LineCollection
-from scipy.sparse.linalg import bicgstab
+from matplotlib.figure import Figure
+from scipy.sparse.linalg import bicgstab, splu
 from scipy.integrate import ode
 
 
@@ -180,6 +243,487 @@ def dCdt_default(Cs, dPs, params):
     return dCdt, S
 
 
+def dCdt_asymmetric(Cs, dPs, params, ages=None):
+    """
+    Calculate dC/dt and S as in dCdt_default, but with different rates for
+    conduits that grow (S > 1) and shrink (S < 1), changing with conduit
+    age (DESIRED FEATURE 3).
+
+    dC/dt = rate*(C^((w-1)/w))*(S-1), where rate is 'rgrow' if S > 1 and
+    'rshrink' otherwise for young conduits. Old conduits respond with rates
+    multiplied by 'oldgrow' and 'oldshrink', and the rates change from young
+    to old values with age timescale 'tau':
+        rate = rateold + (rateyoung - rateold)*exp(-age/tau)
+
+    Parameters
+    ----------
+    Cs : array, dim = 1
+        1-by-n array of conductivities (floats)
+    dPs : array, dim = 1
+        1-by-n array of pressure differences (floats; same length as Cs)
+    params : dictionary
+        params must contain keys 'w', 'yminusx', 'b', 'rgrow', 'rshrink',
+        'c0'; optional keys 'oldgrow', 'oldshrink' (default 1: no change
+        with age) and 'tau' (default 1).
+    ages : array, dim = 1
+        Ages of conduits (same length as Cs); None treats all as young.
+        Colony.solvecolony passes ages (InnerAge, OutflowAge) to laws with
+        attribute usesage.
+
+    Returns
+    -------
+    tuple : length 2, arrays of values for dConductivity/dt and for S.
+    """
+    w = params.get('w')
+    z = params.get('yminusx')/w
+    # Floor on conductivities set to 0.
+    Cflr = np.maximum(Cs, 0)
+    S = abs(params.get('b')*(Cflr**z)*dPs)
+    growing = S > 1
+    rate = np.where(growing, params.get('rgrow'), params.get('rshrink'))
+    oldgrow = params.get('oldgrow', 1)
+    oldshrink = params.get('oldshrink', 1)
+    if ages is not None and (oldgrow != 1 or oldshrink != 1):
+        oldrate = rate * np.where(growing, oldgrow, oldshrink)
+        rate = oldrate + (rate - oldrate)*np.exp(
+            -np.asarray(ages)/params.get('tau', 1))
+    dCdt = rate * (Cflr**((w-1)/w)) * (S - 1)
+    # For Cs <= c0, only allow positive dC/dt
+    dCdt[(Cflr < params.get('c0')) & (dCdt < 0)] = 0
+    return dCdt, S
+
+
+# Laws with usesage are called with conduit ages (see Colony.solvecolony).
+dCdt_asymmetric.usesage = True
+
+# dC/dt laws by name, so saved colonies can store the law as a name (see
+# Colony.save and loadcolony). Add user-defined laws with registerdCdt.
+dCdt_laws = {'dCdt_default': dCdt_default,
+             'dCdt_asymmetric': dCdt_asymmetric}
+
+
+def registerdCdt(dCdt, name=None):
+    """
+    Register a dC/dt function (with the signature of dCdt_default) so that
+    colonies using it can be saved and loaded by name.
+
+    Parameters
+    ----------
+    dCdt : function
+        dC/dt function
+    name : str
+        Name to store it under; defaults to dCdt.__name__
+    """
+    dCdt_laws[dCdt.__name__ if name is None else name] = dCdt
+
+
+def _dCdtname(dCdt):
+    """Registered name of a dC/dt function."""
+    for name, law in dCdt_laws.items():
+        if law is dCdt:
+            return name
+    raise ValueError('dC/dt function ' + repr(dCdt) + ' is not registered; '
+                     'use registerdCdt before saving.')
+
+
+def inflowgain_constant(times, params):
+    """
+    Constant schedule for an inflow component (see Colony.addinflow).
+
+    Parameters
+    ----------
+    times : array
+        Times (colony time)
+    params : dictionary
+        Optional key 'amplitude' (default 1)
+
+    Returns
+    -------
+    array of gains, same length as times
+    """
+    return np.full(np.shape(times), float(params.get('amplitude', 1)))
+
+
+def inflowgain_periodic(times, params):
+    """
+    Sinusoidal schedule for an inflow component (see Colony.addinflow):
+    amplitude*sin(2*pi*(times/period + phase)).
+
+    Parameters
+    ----------
+    times : array
+        Times (colony time)
+    params : dictionary
+        params must contain key 'period'; optional keys 'amplitude'
+        (default 1) and 'phase' (fraction of period, default 0)
+
+    Returns
+    -------
+    array of gains, same length as times
+    """
+    return params.get('amplitude', 1) * np.sin(
+        2*np.pi*(np.asarray(times)/params['period'] + params.get('phase', 0)))
+
+
+def inflowgain_window(times, params):
+    """
+    On/off schedule for an inflow component (see Colony.addinflow): gain
+    is 1 from 'start' until 'stop' and 0 otherwise. With 'period', the
+    window repeats every period from start (intermittent pumping).
+
+    Parameters
+    ----------
+    times : array
+        Times (colony time)
+    params : dictionary
+        Optional keys 'start' (default 0), 'stop' (default inf) and 'period'
+        (default None: no repeats)
+
+    Returns
+    -------
+    array of gains, same length as times
+    """
+    times = np.asarray(times, dtype=float)
+    start = params.get('start', 0)
+    since = times - start
+    if params.get('period') is not None:
+        since = np.where(since >= 0, since % params['period'], since)
+    return ((since >= 0) & (since < params.get('stop', np.inf) - start)
+            ).astype(float)
+
+
+# Schedules for time-varying inflow by name, so they can be saved with a
+# colony (like dCdt_laws). User-defined schedules (with the signature of
+# inflowgain_constant) can be added here.
+inflow_gains = {'constant': inflowgain_constant,
+                'periodic': inflowgain_periodic,
+                'window': inflowgain_window}
+
+
+def _coarsenparams(params, factor, conduits):
+    """
+    dC/dt parameters for a colony coarsened by factor (see Colony.coarsen).
+
+    Parameters of the form used by dCdt_default ('w', 'yminusx', 'b', 'r',
+    'c0'; or 'rgrow' and 'rshrink' in place of 'r') are rescaled so that S
+    and dC/dt of a uniform colony match between resolutions; other
+    parameters are copied unchanged.
+    Inner conduits keep their conductivity, but pressure drops along coarse
+    edges are factor times larger, so b is divided by factor.
+    Outflow conduits are factor^2 fine conduits in parallel with the same
+    pressure drop: C scales by factor^2, so b is divided by
+    factor^(2*yminusx/w), c0 multiplied by factor^2 and rates (r, rgrow,
+    rshrink) multiplied by factor^(2/w) (since dC/dt ~ r*C^((w-1)/w) must
+    scale as C).
+    """
+    params = dict(params)
+    if conduits == 'inner':
+        if 'b' in params:
+            params['b'] = params['b'] / factor
+    elif {'w', 'yminusx', 'b'} <= set(params):
+        w = params['w']
+        params['b'] = params['b'] * factor**(-2*params['yminusx']/w)
+        for rate in ('r', 'rgrow', 'rshrink'):
+            if rate in params:
+                params[rate] = params[rate] * factor**(2/w)
+        if params.get('c0') is not None:
+            params['c0'] = params['c0'] * factor**2
+    return params
+
+
+def _latticeedges(n, rowstart, rowstop):
+    """
+    Edge indices (tail node, head node) for zooid rows rowstart to rowstop-1
+    of a colony with n nodes per row.
+
+    Edges are grouped by row: for each row, the n-1 edges joining neighbours
+    within the row, then the edge wrapping the end of the row around to its
+    beginning, then (for rows above the first) the n/2 edges joining every
+    other node of the row below to the row. Because each row only adds edges
+    to itself and the row below, edges for new distal rows can be appended
+    to those of an existing colony without renumbering.
+
+    Parameters
+    ----------
+    n : int
+        number of nodes per row (2 per zooid column)
+    rowstart, rowstop : int
+        first row and one past the last row to generate edges for
+
+    Returns
+    -------
+    tuple : (rowinds, colinds), arrays of tail and head node indices
+    """
+    # Offsets (relative to first node of a row) of each edge in a row block.
+    tailoffsets = np.concatenate((np.arange(0, n-1), [0],
+                                  np.arange(1, n, 2) - n))
+    headoffsets = np.concatenate((np.arange(1, n), [n-1],
+                                  np.arange(0, n, 2)))
+    rows = np.arange(rowstart, rowstop)[:, np.newaxis]
+    rowinds = rows*n + tailoffsets
+    colinds = rows*n + headoffsets
+    # The first row has no row below it, so drop its edges to row -1.
+    keep = np.ones(rowinds.shape, dtype=bool)
+    keep[rows[:, 0] == 0, n:] = False
+    return rowinds[keep], colinds[keep]
+
+
+def _incidence(rowinds, colinds, nnodes):
+    """
+    Incidence matrix (sparse, one row per edge) for edges from rowinds to
+    colinds in a network of nnodes inner nodes. Tails are -1, heads are 1.
+    """
+    nedges = len(rowinds)
+    edgenums = np.arange(nedges)
+    return (sparse.coo_matrix(([-1]*nedges, (edgenums, rowinds)),
+                              [nedges, nnodes]) +
+            sparse.coo_matrix(([1]*nedges, (edgenums, colinds)),
+                              [nedges, nnodes]))
+
+
+class ColonyTopology:
+    """
+    The ColonyTopology class holds the lattice of a colony: node coordinates,
+    edge indices (rowinds, colinds) and the sparse matrices built from them.
+
+    Topologies are treated as immutable (their arrays, including those of
+    the sparse matrices, are read-only) so one
+    topology can be shared by every colony of the same size: Colony objects
+    hold a topology plus their own conductivity, inflow and mask arrays.
+    ColonyTopology.get returns the shared topology for a lattice size, and
+    grown returns the topology of a larger colony, extending (not
+    rebuilding) the arrays and matrices.
+
+    Only the edge index arrays are built when a topology is created. Node
+    coordinates and matrices are computed the first time they are used and
+    then cached (solving the network only needs IncidenceFull; Adjacency,
+    Degree and Laplacian are only used for plots and analysis).
+    """
+    # Topologies currently in use, by (n, m). Weak references, so a topology
+    # is freed once no colony uses it.
+    _shared = weakref.WeakValueDictionary()
+
+    def __init__(self, n, m, rowinds=None, colinds=None, UpperAdjacency=None,
+                 Incidence=None):
+        """
+        Create topology for m rows of n nodes. Usually called through
+        ColonyTopology.get or grown.
+
+        Parameters
+        ----------
+        n : int
+            number of nodes per row (2 per zooid column)
+        m : int
+            number of rows
+        rowinds, colinds : arrays
+            tail and head node indices of edges (see _latticeedges); computed
+            if not given
+        UpperAdjacency, Incidence : sparse matrices
+            optional precomputed matrices (e.g. extended from a smaller
+            topology); otherwise computed when first used
+        """
+        self.n = n
+        self.m = m
+        if rowinds is None:
+            # Define indices for node-node connections in adjacency matrix.
+            # Rowinds and colinds define arrays of indices for which internal
+            # nodes connect to each other (in upper triangular matrix). Edges
+            # are numbered row by row (see _latticeedges), so growing the
+            # colony only appends edges.
+            rowinds, colinds = _latticeedges(n, 0, m)
+        self.rowinds = _readonly(rowinds)
+        self.colinds = _readonly(colinds)
+        # Seed cached properties with any precomputed matrices.
+        if UpperAdjacency is not None:
+            self.__dict__['UpperAdjacency'] = _readonlymatrix(UpperAdjacency)
+        if Incidence is not None:
+            self.__dict__['Incidence'] = _readonlymatrix(Incidence)
+
+    @functools.cached_property
+    def ys(self):
+        """Y position of nodes."""
+        return _readonly(np.arange(0, self.m * self.n) // self.n)
+
+    @functools.cached_property
+    def xs(self):
+        """X position of nodes."""
+        return _readonly(np.arange(0, self.m * self.n) % self.n + self.ys)
+
+    @functools.cached_property
+    def ysjig(self):
+        """Y positions, shifted to make hexagons for plotting."""
+        return _readonly(self.ys + 0.2 * (np.arange(0, self.m * self.n) % 2))
+
+    @functools.cached_property
+    def UpperAdjacency(self):
+        """
+        Upper triangular part of adjacency matrix for internal nodes
+        (coo_matrix).
+        """
+        return _readonlymatrix(sparse.coo_matrix(
+            ([1] * len(self.rowinds), (self.rowinds, self.colinds)),
+            [self.m*self.n, self.m*self.n]))
+
+    @functools.cached_property
+    def Adjacency(self):
+        """Adjacency matrix for internal nodes (csr_matrix)."""
+        return _readonlymatrix((self.UpperAdjacency +
+                                self.UpperAdjacency.transpose()).tocsr())
+
+    @functools.cached_property
+    def Degree(self):
+        """Degree matrix (connections per node) for internal nodes."""
+        return _readonlymatrix(sparse.diags(
+            self.Adjacency.sum(axis=1).transpose().tolist()[0], 0))
+
+    @functools.cached_property
+    def Laplacian(self):
+        """Laplacian matrix of internal nodes (csr_matrix)."""
+        return _readonlymatrix((self.Adjacency - self.Degree).tocsr())
+
+    @functools.cached_property
+    def Incidence(self):
+        """
+        Incidence matrix for internal nodes (one row per edge, in the same
+        order as rowinds and colinds).
+        """
+        return _readonlymatrix(
+            _incidence(self.rowinds, self.colinds, self.m*self.n))
+
+    @functools.cached_property
+    def IncidenceFull(self):
+        """
+        Incidence matrix with edges to outside added (csr_matrix). Note that
+        only add entry for internal node (tail of edge) not outside, because
+        including outer node makes matrix only solvable to an additive
+        constant.
+        """
+        return _readonlymatrix(sparse.vstack((
+            self.Incidence,
+            sparse.diags(([-1]*(self.m*self.n)), 0).tocsr())).tocsr())
+
+    @classmethod
+    def get(cls, n, m):
+        """
+        Shared topology for colony with m rows of n nodes (created if no
+        colony of that size exists).
+        """
+        topology = cls._shared.get((n, m))
+        if topology is None:
+            topology = cls(n, m)
+            cls._shared[(n, m)] = topology
+        return topology
+
+    def grown(self, rows=1):
+        """
+        Topology with rows zooid rows added at the distal (upper) edge.
+
+        Node and edge numbering is unchanged: new edges are appended to the
+        edge arrays, and matrices of this topology that have already been
+        built are extended rather than rebuilt.
+        """
+        n = self.n
+        m = self.m
+        newm = m + rows
+        topology = self._shared.get((n, newm))
+        if topology is not None:
+            return topology
+
+        # Append edges for the new rows (including edges joining the old
+        # distal row to the first new row).
+        newrowinds, newcolinds = _latticeedges(n, m, newm)
+
+        # Extend matrices by appending entries for the new edges and nodes.
+        UpperAdjacency = None
+        if 'UpperAdjacency' in self.__dict__:
+            UpperAdjacency = sparse.coo_matrix(
+                (np.concatenate((self.UpperAdjacency.data,
+                                 [1] * len(newrowinds))),
+                 (np.concatenate((self.UpperAdjacency.row, newrowinds)),
+                  np.concatenate((self.UpperAdjacency.col, newcolinds)))),
+                [newm*n, newm*n])
+        Incidence = None
+        if 'Incidence' in self.__dict__:
+            Incidence = self.Incidence.tocoo()
+            Incidence = sparse.vstack((
+                sparse.coo_matrix((Incidence.data,
+                                   (Incidence.row, Incidence.col)),
+                                  [len(self.rowinds), newm*n]),
+                _incidence(newrowinds, newcolinds, newm*n)))
+
+        topology = ColonyTopology(
+            n, newm, np.concatenate((self.rowinds, newrowinds)),
+            np.concatenate((self.colinds, newcolinds)),
+            UpperAdjacency, Incidence)
+        self._shared[(n, newm)] = topology
+        return topology
+
+
+def _readonly(values):
+    """Array of values, flagged read-only (for shared topology arrays)."""
+    values = np.asarray(values)
+    values.setflags(write=False)
+    return values
+
+
+def _readonlymatrix(matrix):
+    """
+    Sparse matrix with its index and value arrays flagged read-only (for
+    shared topology matrices).
+    """
+    for name in ('data', 'indices', 'indptr', 'row', 'col', 'offsets'):
+        values = getattr(matrix, name, None)
+        if isinstance(values, np.ndarray):
+            values.setflags(write=False)
+    return matrix
+
+
+def _topologyattribute(name):
+    """Read-only Colony attribute taken from the colony's topology."""
+    return property(lambda self: getattr(self.topology, name),
+                    doc='Topology attribute ' + name +
+                    ' (see ColonyTopology)')
+
+
+def _statearray(values):
+    """
+    Read-only array of values for colony state. values is copied unless it
+    cannot be changed anyway (e.g. memory-mapped read-only), so the state
+    cannot change without the colony's version changing.
+    """
+    values = np.asanyarray(values)
+    if values.flags.writeable or (isinstance(values.base, np.ndarray) and
+                                  values.base.flags.writeable):
+        values = np.array(values)
+    values.setflags(write=False)
+    return values
+
+
+def _stategains(gains):
+    """
+    Inflow schedules (name, params) for colony state, as nested tuples (so
+    they cannot change without the colony's version changing).
+    """
+    return tuple((gain, tuple(sorted(dict(params).items())))
+                 for gain, params in gains)
+
+
+def _stateattribute(name, convert=_statearray):
+    """
+    Colony state attribute (stored as '_' + name, converted by convert to a
+    read-only value); assigning it increments the colony's version.
+    """
+    def setstate(self, value):
+        self.__dict__['_' + name] = convert(value)
+        self.version += 1
+    return property(lambda self: self.__dict__['_' + name], setstate,
+                    doc='Colony state attribute ' + name)
+
+
+# Colony attributes holding conductivities, by kind of conduit.
+_CONDUITS = {'inner': 'InnerConduits', 'outer': 'OutflowConduits'}
+
+
 class Colony:
     """
     The Colony class represents the connections and arrangement of zooids
@@ -190,17 +734,19 @@ class Colony:
     tentacle crowns driving the flow and forming the conduits) it is easier
     to represent the colony spiraling around the cylinder (hence the slant
     in the plot of the x-y positions of the nodes). The lower side has
-    closed boundary (or mirror symmetry). Currently, the upper boundary is
-    also closed, but in future iterations it should be modified to become
-    the growing edge, with special outflow conditions.
+    closed boundary (or mirror symmetry). The upper boundary is the growing
+    edge: grow adds zooid rows there. It is still closed, but in future
+    iterations it may need special outflow conditions.
 
     Inner nodes (plotted as dots by ColonyPlot) represent the corners
     where three lophophores meet, so 6 nodes surround each lophophore.
     Hence, the inner edges (plotted as lines) are the open spaces under the
     canopy between the bases of the lophophores. Only inner nodes and edges
     are represented in the Incidence, Laplacian, and Adjacency matrices
-    stored as Colony attributes. Their conductivities are represented in
-    InnerConduits.
+    available as Colony attributes. These and the node coordinates belong to
+    the colony's topology (a ColonyTopology shared by all colonies of the
+    same size), so copies of a colony only duplicate its own state. Their
+    conductivities are represented in InnerConduits.
 
     Outflow conductivities represents gaps allowing flow to the outside
     (including chimneys). These edges (in OutflowConduits) connect the
@@ -233,66 +779,21 @@ class Colony:
             (using pressure differences). ...inner, ...outer are for conduits
             connecting inner-inner (or inner-growth zone), or inner-outer nodes
         """
-        # Set up numbers of nodes.
-        n = nz * 2  # 2 nodes added for every zooid from left-right;
-        m = mz  # 1 node added for every zooid proximal-distal
-        mn = np.arange(0, m * n)  # Number nodes. One node added on distal end
-        # for every zooid row added.
-        self.n = n
-        self.m = m
+        # Version is incremented whenever conductivities, inflow or frozen
+        # masks change; _solution caches (version, pressures).
+        self.version = 0
+        self._solution = None
 
-        # Determine y and x coordinates.
-        self.ys = mn // n  # Y position of nodes.
-        self.xs = mn % n+self.ys  # X position of nodes
-        self.ysjig = self.ys + 0.2 * (mn % 2)  # Y positions, shifted to
-        # make hexagons for plotting.
-
-        # Define indices for node-node connections in adjacency matrix.
-        # Rowinds and colinds define arrays of indices for which internal nodes
-        # connect to each other (in upper triangular matrix).
-        # Each node from 0 to m*n-1 connects to next node in the network.
-        rowinds = np.arange(0, m*n)
-        colinds = np.arange(1, m*n+1)
-        # delete edges connecting nodes at end of one row to beginning of next
-        rowinds = np.delete(rowinds, np.arange(n-1, m*n, n))
-        colinds = np.delete(colinds, np.arange(n-1, m*n, n))
-        # add edges connecting beginning of row to end of row
-        rowinds = np.concatenate((rowinds, np.arange(0, (m-1)*n+1, n)), axis=0)
-        colinds = np.concatenate((colinds, np.arange(n-1, m*n, n)), axis=0)
-        # add edges connecting every other node to node in row ahead.
-        rowinds = np.concatenate((rowinds, np.arange(1, (m-1)*n, 2)), axis=0)
-        colinds = np.concatenate((colinds, np.arange(n, m*n, 2)), axis=0)
-        self.rowinds = rowinds
-        self.colinds = colinds
+        # Set up lattice (numbers of nodes, coordinates, edges and matrices).
+        # Colonies of the same size share one (immutable) ColonyTopology.
+        self.topology = ColonyTopology.get(nz * 2, mz)
+        n = self.n
+        m = self.m
 
         # Define conductivity among interior nodes. Fill in one value,
         # InnerConduits, for conductivities among nodes within colony.
-        self.InnerConduits = np.array([InnerConductivity] * len(rowinds))
-
-        # Combine node connection indices to form upper triangular part of
-        # adjacency matrix for internal nodes
-        UpperAdjacency = sparse.coo_matrix(
-            ([1] * len(rowinds), (rowinds, colinds)), [m*n, m*n])
-        self.UpperAdjacency = UpperAdjacency
-        Adjacency = UpperAdjacency + UpperAdjacency.transpose()
-        self.Adjacency = Adjacency.tocsr()
-
-        # Create degree matrix (connections per node) for internal nodes
-        Degree = sparse.diags(
-            Adjacency.sum(axis=1).transpose().tolist()[0], 0)
-
-        # Create Laplacian matrix of internal nodes
-        self.Laplacian = (Adjacency - Degree).tocsr()
-
-        # COO matrix sorts row indices, so convenient for finding sorted edges
-        # to make incidence matrix for internal nodes.
-        self.Incidence = (sparse.coo_matrix(([-1]*len(rowinds),
-                          (np.arange(len(rowinds)), rowinds)),
-                          [UpperAdjacency.nnz, n*m]) +
-                          sparse.coo_matrix(([1]*len(colinds),
-                                             (np.arange(len(colinds)),
-                                              colinds)),
-                          [len(rowinds), n*m]))
+        self.InnerConduits = np.array([InnerConductivity] *
+                                      len(self.rowinds))
 
         # Define default conductivity for leakage from internal nodes to
         # outside node.
@@ -301,48 +802,425 @@ class Colony:
         # Set default inflow magnitudes at each node
         self.InFlow = np.array([Incurrents]*(m*n))
 
+        # Time-varying inflow: inflow at colony time t is InFlow plus
+        # components InFlowProfiles[k] (one value per node) times schedules
+        # InFlowGains[k] (name in inflow_gains, params) evaluated at t. See
+        # addinflow and inflowat. develop advances time.
+        self.time = 0.0
+        self.InFlowProfiles = np.zeros((0, m*n))
+        self.InFlowGains = []
+        # (version, pressures for InFlow and each profile); see pressuresat.
+        self._inflowbasis = None
+
+        # Masks of frozen conduits, whose conductivities are held fixed during
+        # integration (e.g. to punch a hole in the colony).
+        self.InnerFrozen = np.zeros(len(self.rowinds), dtype=bool)
+        self.OutflowFrozen = np.zeros(m*n, dtype=bool)
+
+        # Ages of conduits (time since they were added to the colony).
+        # develop advances them by tmax; new conduits from grow start at 0.
+        self.InnerAge = np.zeros(len(self.rowinds))
+        self.OutflowAge = np.zeros(m*n)
+
         # Still need to add A) edges going out of colony
 
-        # Set parameters for function for determining dConductivity/dt.
-        self.dCdt_inner = lambda x, y: dCdt(x, y, dCdt_in_params)
-        self.dCdt_outer = lambda x, y: dCdt(x, y, dCdt_out_params)
+        # Set parameters for function for determining dConductivity/dt. The
+        # law and its parameters are kept so colonies can be saved (by law
+        # name) and copied; partial (unlike lambda) can also be pickled.
+        self.dCdt = dCdt
+        self.dCdt_in_params = dict(dCdt_in_params)
+        self.dCdt_out_params = dict(dCdt_out_params)
+        self.dCdt_inner = functools.partial(dCdt, params=self.dCdt_in_params)
+        self.dCdt_outer = functools.partial(dCdt, params=self.dCdt_out_params)
+
+    # Lattice attributes are shared through the colony's topology.
+    n = _topologyattribute('n')
+    m = _topologyattribute('m')
+    rowinds = _topologyattribute('rowinds')
+    colinds = _topologyattribute('colinds')
+    xs = _topologyattribute('xs')
+    ys = _topologyattribute('ys')
+    ysjig = _topologyattribute('ysjig')
+    UpperAdjacency = _topologyattribute('UpperAdjacency')
+    Adjacency = _topologyattribute('Adjacency')
+    Degree = _topologyattribute('Degree')
+    Laplacian = _topologyattribute('Laplacian')
+    Incidence = _topologyattribute('Incidence')
+
+    # Conductivities, inflow (and its schedules), frozen masks, ages and
+    # time are the colony's own state. They are read-only: change them by
+    # assignment (or with setconductivities, freezeconduits, ...), which
+    # increments version so cached solutions are updated.
+    InnerConduits = _stateattribute('InnerConduits')
+    OutflowConduits = _stateattribute('OutflowConduits')
+    InFlow = _stateattribute('InFlow')
+    InnerFrozen = _stateattribute('InnerFrozen')
+    OutflowFrozen = _stateattribute('OutflowFrozen')
+    InnerAge = _stateattribute('InnerAge')
+    OutflowAge = _stateattribute('OutflowAge')
+    InFlowProfiles = _stateattribute('InFlowProfiles')
+    InFlowGains = _stateattribute('InFlowGains', _stategains)
+    time = _stateattribute('time', float)
+
+    def __deepcopy__(self, memo):
+        """
+        Deep copy of colony state (conductivities, inflow, masks, ages and
+        dC/dt parameters); the immutable topology and read-only state arrays
+        are shared, not copied.
+        """
+        newcolony = copy.copy(self)
+        memo[id(self)] = newcolony
+        for name, value in self.__dict__.items():
+            if name != 'topology' and not (isinstance(value, np.ndarray) and
+                                           not value.flags.writeable):
+                setattr(newcolony, name, copy.deepcopy(value, memo))
+        return newcolony
+
+    def copy(self):
+        """
+        Copy of colony that shares its (immutable) topology, with its own
+        copies of conductivities, inflow, masks and dC/dt parameters.
+        """
+        return copy.deepcopy(self)
+
+    def grow(self, rows=1, InnerConductivity=None, OutflowConductivity=None,
+             Incurrents=None):
+        """
+        Grow the colony by adding zooid rows at the distal (upper) edge.
+
+        Node and edge numbering of the existing colony is unchanged: new nodes
+        and edges are appended, so conductivities of the existing conduits
+        are kept and the sparse matrices are extended rather than rebuilt.
 
-    def setouterconductivities(self, nodeinds, NewOuterConductivities):
+        Parameters
+        ----------
+        rows : int
+            number of zooid rows to add
+        InnerConductivity : float
+            Conductivity of new inner edges. If None, uses the mean
+            conductivity of the edges in the current distal row.
+        OutflowConductivity : float
+            Conductivity of new edges to outside. If None, uses the mean
+            outflow conductivity of the current distal row.
+        Incurrents : float
+            Flow into new nodes. If None, uses the mean inflow of the current
+            distal row.
+        """
+        n = self.n
+        m = self.m
+        # Nodes and edges (those ending in the row) of the current distal row
+        # provide default values for the new rows.
+        distalnodes = np.arange((m-1)*n, m*n)
+        distaledges = self.colinds >= (m-1)*n
+        if InnerConductivity is None:
+            InnerConductivity = self.InnerConduits[distaledges].mean()
+        if OutflowConductivity is None:
+            OutflowConductivity = self.OutflowConduits[distalnodes].mean()
+        if Incurrents is None:
+            Incurrents = self.InFlow[distalnodes].mean()
+
+        # Extend lattice (coordinates, edges and matrices).
+        self.topology = self.topology.grown(rows)
+        nnewedges = len(self.rowinds) - len(self.InnerConduits)
+
+        # Extend conductivity and inflow arrays.
+        self.InnerConduits = np.concatenate((
+            self.InnerConduits, [InnerConductivity] * nnewedges))
+        self.OutflowConduits = np.concatenate((
+            self.OutflowConduits, [OutflowConductivity] * (rows*n)))
+        self.InFlow = np.concatenate((self.InFlow, [Incurrents] * (rows*n)))
+        # New zooids are not part of existing inflow components.
+        self.InFlowProfiles = np.concatenate((
+            self.InFlowProfiles,
+            np.zeros((len(self.InFlowProfiles), rows*n))), axis=1)
+        self.InnerFrozen = np.concatenate((
+            self.InnerFrozen, np.zeros(nnewedges, dtype=bool)))
+        self.OutflowFrozen = np.concatenate((
+            self.OutflowFrozen, np.zeros(rows*n, dtype=bool)))
+        self.InnerAge = np.concatenate((self.InnerAge, np.zeros(nnewedges)))
+        self.OutflowAge = np.concatenate((self.OutflowAge, np.zeros(rows*n)))
+
+    def setouterconductivities(self, nodeinds, NewOuterConductivities,
+                               freeze=False):
         """
         Modify conductivity of edges connecting inner nodes (colony) to
-        outside.
+        outside. Same as setconductivities('outer', ...).
 
         Parameters
         ----------
-        nodeinds : list
-            List of indices of nodes to change (m*n>int>0)
-        NewOuterConductivities : list
-            List of new conductivities to apply (numeric & >0, same length as
-            nodeinds)
-        """
-        if not (isinstance(NewOuterConductivities, list) and
-                isinstance(nodeinds, list)):
-            print('Arguments must be lists. No action taken.')
-            return
-        elif len(NewOuterConductivities) != len(nodeinds):
-            print('List lengths must match. No action taken.')
-            return
-        elif (max(nodeinds) > (self.m*self.n)):
-            print('At least one node index is >m*n. No action taken.')
-            return
-        elif (min(nodeinds) < 0):
-            print('At least one node index is <0. No action taken.')
-            return
-        elif any(not isinstance(item, int) for item in nodeinds):
-            print('At least one node index is not an int. No action taken.')
-            return
-        elif any(item < 0 and isinstance(item, (int, float))
-                 for item in NewOuterConductivities):
-            print('Conductivities must be floats or ints ≥0. No action taken.')
-            return
-        else:
-            for k in range(len(nodeinds)):
-                self.OutflowConduits[nodeinds[k]] = NewOuterConductivities[k]
+        nodeinds : array-like
+            Indices of nodes to change (0≤int<m*n), or boolean mask of nodes
+            (see selectnodes)
+        NewOuterConductivities : array-like or float
+            New conductivities to apply (numeric & ≥0, one per selected node
+            or a single value for all)
+        freeze : boolean, default is False
+            True : also freeze the modified conduits, so their conductivities
+            stay fixed during integration (see freezeconduits)
+        """
+        self.setconductivities('outer', nodeinds, NewOuterConductivities,
+                               freeze=freeze)
+
+    def setconductivities(self, conduits, selection, values, freeze=False):
+        """
+        Modify conductivities of inner edges or of edges to outside.
+
+        Validation and assignment are vectorized, and invalid input raises
+        an error without changing the colony. Increments version, so cached
+        solutions are recalculated.
+
+        Parameters
+        ----------
+        conduits : str
+            'inner' (edges between inner nodes) or 'outer' (edges from inner
+            nodes to outside)
+        selection : array-like
+            Indices of edges ('inner') or nodes ('outer') to change, or a
+            boolean mask over them (e.g. from selectedges or selectnodes)
+        values : array-like or float
+            New conductivities (numeric & ≥0), one per selected conduit or a
+            single value for all
+        freeze : boolean, default is False
+            True : also freeze the modified conduits (see freezeconduits)
+        """
+        name = _CONDUITS.get(conduits)
+        if name is None:
+            raise ValueError("conduits must be 'inner' or 'outer'.")
+        Conduits = getattr(self, name)
+        inds = self._checkselection(selection, Conduits.size)
+        values = np.asarray(values, dtype=float)
+        try:
+            values = np.broadcast_to(values, inds.shape)
+        except ValueError:
+            raise ValueError('Got {} conductivities for {} conduits.'.format(
+                values.size, inds.size))
+        if not np.all(np.isfinite(values) & (values >= 0)):
+            raise ValueError('Conductivities must be finite and ≥0.')
+        # Edit a (float) copy: state arrays are read-only, and integer
+        # conductivities (e.g. default of 1) would truncate.
+        Conduits = Conduits.astype(float)
+        Conduits[inds] = values
+        setattr(self, name, Conduits)
+        if freeze:
+            self.freezeconduits(**{('innerinds' if conduits == 'inner' else
+                                    'outerinds'): inds})
+
+    def _checkselection(self, selection, size):
+        """
+        Check selection (indices or boolean mask) of conduits or nodes out of
+        size, and return it as an array of indices.
+        """
+        selection = np.asarray(selection)
+        if selection.dtype == bool:
+            if selection.shape != (size,):
+                raise ValueError('Boolean mask must have length {}.'.format(
+                    size))
+            return np.flatnonzero(selection)
+        selection = selection.ravel()
+        if selection.size == 0:
+            return selection.astype(int)
+        if not np.issubdtype(selection.dtype, np.integer):
+            raise TypeError('Selection must be integer indices or a boolean '
+                            'mask.')
+        if selection.min() < 0 or selection.max() >= size:
+            raise ValueError('Indices must be ≥0 and <{}.'.format(size))
+        return selection
+
+    def selectnodes(self, rows=None, columns=None, center=None, radius=None):
+        """
+        Boolean mask of nodes in a region of the colony. Nodes must meet all
+        given criteria.
+
+        Parameters
+        ----------
+        rows : tuple
+            (first, last) zooid rows (proximal-distal; 0 ≤ row < m) to
+            include, i.e. a band across the colony
+        columns : tuple
+            (first, last) node columns (0 ≤ column < n; 2 per zooid column)
+            to include, i.e. a band along the colony
+        center : int
+            Index of node at the center of a disc (give with radius)
+        radius : float
+            Radius of disc around center, in node spacings (plot
+            coordinates, wrapping around the cylinder)
+
+        Returns
+        -------
+        ndarray of booleans, length m*n
+        """
+        if (center is None) != (radius is None):
+            raise ValueError('center and radius must be given together.')
+        mask = np.ones(self.m*self.n, dtype=bool)
+        if rows is not None:
+            mask &= (self.ys >= rows[0]) & (self.ys <= rows[1])
+        if columns is not None:
+            nodecolumns = np.arange(self.m*self.n) % self.n
+            mask &= (nodecolumns >= columns[0]) & (nodecolumns <= columns[1])
+        if center is not None:
+            # x distance wraps around the cylinder (period n).
+            dx = (self.xs - self.xs[center] + self.n/2) % self.n - self.n/2
+            dy = self.ysjig - self.ysjig[center]
+            mask &= dx**2 + dy**2 <= radius**2
+        return mask
+
+    def selectedges(self, rows=None, columns=None, center=None, radius=None):
+        """
+        Boolean mask of inner edges with both ends in a region of the colony
+        (see selectnodes for parameters).
+
+        Returns
+        -------
+        ndarray of booleans, length of InnerConduits
+        """
+        nodes = self.selectnodes(rows, columns, center, radius)
+        return nodes[self.rowinds] & nodes[self.colinds]
+
+    def freezeconduits(self, innerinds=None, outerinds=None, frozen=True):
+        """
+        Freeze (or unfreeze) conduits so that their conductivities stay fixed
+        during integration. Frozen conduits are left out of the ODE state, so
+        integration cost shrinks with the number of frozen conduits.
+
+        Parameters
+        ----------
+        innerinds : array-like of ints or booleans
+            Indices (or boolean mask) of inner edges to (un)freeze
+        outerinds : array-like of ints or booleans
+            Indices (or boolean mask) of nodes whose edges to the outside to
+            (un)freeze
+        frozen : boolean, default is True
+            True : freeze the conduits; False : let them evolve again
+        """
+        if innerinds is not None:
+            InnerFrozen = self.InnerFrozen.copy()
+            InnerFrozen[self._checkselection(
+                innerinds, InnerFrozen.size)] = frozen
+            self.InnerFrozen = InnerFrozen
+        if outerinds is not None:
+            OutflowFrozen = self.OutflowFrozen.copy()
+            OutflowFrozen[self._checkselection(
+                outerinds, OutflowFrozen.size)] = frozen
+            self.OutflowFrozen = OutflowFrozen
+
+    def addinflow(self, profile, gain='constant', **gainparams):
+        """
+        Add a component to the inflow into nodes that varies over time and
+        among nodes: at colony time t, inflow is
+            InFlow + sum over components of gain(t)*profile
+        (see inflowat).
+
+        Pressures are linear in inflow, so components cost no extra
+        factorizations: pressuresat solves for every component at once, and
+        integration solves once per right-hand side evaluation as for
+        constant inflow.
+
+        Parameters
+        ----------
+        profile : array-like or float
+            Inflow of the component at each node (length m*n; negative =
+            inflow, as for InFlow), or a single value for all nodes
+        gain : str
+            Schedule (a key of inflow_gains: 'constant', 'periodic',
+            'window')
+        **gainparams :
+            Parameters of the schedule (e.g. period, amplitude, phase for
+            'periodic'; start, stop, period for 'window')
+        """
+        if gain not in inflow_gains:
+            raise ValueError('Unknown inflow schedule ' + repr(gain) +
+                             '; use one of ' + repr(list(inflow_gains)))
+        nnodes = self.m*self.n
+        profile = np.broadcast_to(np.asarray(profile, dtype=float),
+                                  (nnodes,))
+        if not np.isfinite(profile).all():
+            raise ValueError('Inflow profile must be finite.')
+        self.InFlowProfiles = np.concatenate((self.InFlowProfiles,
+                                              profile[np.newaxis, :]))
+        self.InFlowGains = self.InFlowGains + ((gain, gainparams),)
+
+    def dropout(self, selection, start=0, stop=np.inf, period=None):
+        """
+        Stop pumping at chosen nodes (zooid dropout) from start until stop;
+        with period, the dropout repeats every period (intermittent pumping).
+
+        Adds an inflow component cancelling InFlow at the chosen nodes, with
+        a 'window' schedule (see addinflow).
+
+        Parameters
+        ----------
+        selection : array-like
+            Indices of nodes, or boolean mask of nodes (see selectnodes)
+        start, stop : float
+            Colony times when pumping stops and resumes
+        period : float
+            Repeat interval of the dropout (None: no repeats)
+        """
+        nodes = self._checkselection(selection, self.m*self.n)
+        profile = np.zeros(self.m*self.n)
+        profile[nodes] = -self.InFlow[nodes]
+        self.addinflow(profile, 'window', start=start, stop=stop,
+                       period=period)
+
+    def clearinflow(self):
+        """Remove all time-varying inflow components (see addinflow)."""
+        self.InFlowProfiles = np.zeros((0, self.m*self.n))
+        self.InFlowGains = []
+
+    def _inflowgains(self, times):
+        """
+        Gains of inflow components at times (colony time): array with one
+        row per time, one column per component.
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        gains = np.empty((times.size, len(self.InFlowGains)))
+        for k, (gain, params) in enumerate(self.InFlowGains):
+            gains[:, k] = inflow_gains[gain](times, dict(params))
+        return gains
+
+    def inflowat(self, t=0):
+        """
+        Inflow into each node at time t after the colony's time (self.time),
+        including time-varying components (see addinflow).
+        """
+        if not self.InFlowGains:
+            return self.InFlow
+        return self.InFlow + self._inflowgains(self.time + t)[0].dot(
+            self.InFlowProfiles)
+
+    def pressuresat(self, times):
+        """
+        Pressures at nodes at many times (after the colony's time) with the
+        colony's current conductivities.
+
+        The network matrix is factorized once (sparse LU) per colony version
+        and solved for InFlow and every inflow profile together; pressures
+        at any time are then a combination of these solutions, weighted by
+        the schedules (pressures are linear in inflow).
+
+        Parameters
+        ----------
+        times : array-like
+            Times after self.time
+
+        Returns
+        -------
+        ndarray of pressures, one row per time
+        """
+        if self._inflowbasis is None or self._inflowbasis[0] != self.version:
+            conductivityfull = np.concatenate((self.InnerConduits,
+                                               self.OutflowConduits))
+            IncidenceFull = self.topology.IncidenceFull
+            A = (IncidenceFull.transpose() *
+                 sparse.diags(conductivityfull, 0) * IncidenceFull)
+            basis = splu(sparse.csc_matrix(A)).solve(np.column_stack(
+                (self.InFlow, np.transpose(self.InFlowProfiles))))
+            self._inflowbasis = (self.version, basis)
+        basis = self._inflowbasis[1]
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        weights = np.column_stack((np.ones(times.size),
+                                   self._inflowgains(self.time + times)))
+        return weights.dot(np.transpose(basis))
 
     def solvecolony(self, calcpressures=True, calcflows=False, calcdCdt=False,
                     **kwargs):
@@ -388,6 +1266,11 @@ class Colony:
                 conductivity and flow
             Flows : numpy matrix of flows along each edge/conduit
             dCdt : ndarray of values of dC/dt
+            solvetol : relative tolerance for bicgstab pressure solve
+                (default 1e-5)
+            t : time after the colony's time (default 0). Inflow is taken
+                at that time (see inflowat), and dC/dt laws that use age
+                (usesage) get ages InnerAge + t and OutflowAge + t
         calcpressures : boolean, default is True
             True : calculate pressures
         calcflows : boolean, default is False
@@ -401,6 +1284,9 @@ class Colony:
             dictionary stores conductivityfull (matrix of all conductivities,
             concatenating inner and outer), IncidenceFull (incidence matrix
             concatenating inner & outer edges), pressures, flows, S, & dC/dt
+            (0 for frozen conduits), SolveIterations (bicgstab iterations
+            used; 0 if pressures were not solved for) and SolveInfo (bicgstab
+            convergence information; 0 if converged)
         """
         # Combine inner and outflow conduits into one diagonal conductivity
         # matrix.
@@ -410,14 +1296,9 @@ class Colony:
         else:
             conductivityfull = kwargs.get('conductivityfull')
 
-        # Add edges to outside to incidence matrix. Note that only add entry
-        # for internal node (tail of edge) not outside, because including
-        # including outer node makes matrix only solvable to an additive
-        # constant.
+        # Incidence matrix including edges to outside (see ColonyTopology).
         if (kwargs.get('IncidenceFull') is None):
-            IncidenceFull = sparse.vstack((
-                self.Incidence, sparse.diags(([-1]*(self.m*self.n)), 0).tocsr()
-                ))
+            IncidenceFull = self.topology.IncidenceFull
         else:
             IncidenceFull = kwargs.get('IncidenceFull')
 
@@ -427,23 +1308,60 @@ class Colony:
         # pressure solution, it may be 2x faster still (though my test for that
         # may be biased: I used the direct solution as the initial estimate, so
         # it was already right on the best value.
-        if calcpressures:
-            if (kwargs.get('Pressures') is None):
-                Pressures = bicgstab(IncidenceFull.transpose() *
-                                     sparse.diags(conductivityfull, 0) *
-                                     IncidenceFull,
-                                     np.asmatrix(self.InFlow).transpose())[0]
+        # Pressures for the colony's own conductivities are cached until its
+        # version changes; otherwise the cached pressures are still a good
+        # starting guess.
+        usecache = (kwargs.get('conductivityfull') is None and
+                    kwargs.get('IncidenceFull') is None)
+        iterations = [0]
+        solveinfo = 0
+        InFlow = self.inflowat(kwargs.get('t', 0))
+
+        def countiterations(xk):
+            iterations[0] += 1
+
+        if (calcpressures and usecache and self._solution is not None and
+                self._solution[0] == self.version and
+                kwargs.get('t', 0) == 0):
+            Pressures = self._solution[1]
+        elif calcpressures and usecache and self.InFlowGains:
+            # With time-varying inflow, solve once for all inflow components
+            # (see pressuresat).
+            Pressures = self.pressuresat(kwargs.get('t', 0))[0]
+            if kwargs.get('t', 0) == 0:
+                self._solution = (self.version, _readonly(Pressures))
+        elif calcpressures:
+            x0 = kwargs.get('Pressures')
+            if (x0 is None and self._solution is not None and
+                    len(self._solution[1]) == len(InFlow)):
+                x0 = self._solution[1]
+            if kwargs.get('solvetol') is not None:
+                solvetol = kwargs.get('solvetol')
             else:
-                Pressures = bicgstab(IncidenceFull.transpose() *
-                                     sparse.diags(conductivityfull, 0) *
-                                     IncidenceFull,
-                                     np.asmatrix(self.InFlow).transpose(),
-                                     x0=kwargs.get('Pressures'))[0]
+                solvetol = 1e-5  # bicgstab default
+            A = (IncidenceFull.transpose() *
+                 sparse.diags(conductivityfull, 0) * IncidenceFull)
+            Pressures, solveinfo = bicgstab(A, InFlow, x0=x0,
+                                            rtol=solvetol,
+                                            callback=countiterations)
+            # A poor starting guess (e.g. when the integrator overshoots) can
+            # make bicgstab fail, or stop although the true residual is still
+            # large; then start again from zero.
+            if x0 is not None and (
+                    solveinfo != 0 or np.linalg.norm(A*Pressures - InFlow)
+                    > 10*solvetol*np.linalg.norm(InFlow)):
+                Pressures, solveinfo = bicgstab(A, InFlow,
+                                                rtol=solvetol,
+                                                callback=countiterations)
+            if usecache and kwargs.get('t', 0) == 0:
+                self._solution = (self.version, _readonly(Pressures))
         else:
             Pressures = kwargs['Pressures']
 
         networksols = {"Pressures": Pressures, "conductivityfull":
-                       conductivityfull, "IncidenceFull": IncidenceFull}
+                       conductivityfull, "IncidenceFull": IncidenceFull,
+                       "SolveIterations": iterations[0],
+                       "SolveInfo": solveinfo}
 
         # Calculate flows based on pressure, conductivities, and connectivity
         if calcflows:
@@ -466,8 +1384,21 @@ class Colony:
             # Split conducitivity into arrays for inner and outflow conduits
             innerCs = networksols['conductivityfull'][:len(self.InnerConduits)]
             outerCs = networksols['conductivityfull'][len(self.InnerConduits):]
-            dCdt_i, S_i = self.dCdt_inner(innerCs, dPinner)
-            dCdt_o, S_o = self.dCdt_outer(outerCs, dPouter)
+            # Laws that use age get current ages (advanced by t, so ages
+            # need not be part of the ODE state).
+            agekw_i = {}
+            agekw_o = {}
+            if getattr(self.dCdt, 'usesage', False):
+                t = kwargs.get('t', 0)
+                agekw_i = {'ages': self.InnerAge + t}
+                agekw_o = {'ages': self.OutflowAge + t}
+            dCdt_i, S_i = self.dCdt_inner(innerCs, dPinner, **agekw_i)
+            dCdt_o, S_o = self.dCdt_outer(outerCs, dPouter, **agekw_o)
+            # Frozen conduits have dC/dt = 0 (S is still reported).
+            if self.InnerFrozen.any():
+                dCdt_i[self.InnerFrozen] = 0
+            if self.OutflowFrozen.any():
+                dCdt_o[self.OutflowFrozen] = 0
 
             networksols["S"] = np.concatenate((S_i, S_o))
             networksols["dCdt"] = np.concatenate((dCdt_i, dCdt_o))
@@ -506,59 +1437,105 @@ class Colony:
         for flows to outside node (scaled by flow magnitude).
         """
         plt.figure()  # Create new figure.
-        # Plot lines for edges among internal nodes; line width: conductivity
-        # Convert coordinates of node-pairs to x-y coordinates of line segments
-        segments = np.stack((np.vstack((self.xs[self.rowinds],
-                                        self.xs[self.colinds])),
-                             np.vstack((self.ysjig[self.rowinds],
-                                        self.ysjig[self.colinds]
-                                        )))).transpose()
-        # Create matplotlib.collections.LineCollection object from segments,
-        # with widths defined by conduit conductivity
-        edges = LineCollection(segments, zorder=1,
-                               linewidths=np.dot(linescale,
-                                                 self.InnerConduits**linepwr))
-        # Plot segments.
-        plt.gca().add_collection(edges)
-        # Only included these two lines setting xlim & ylim for ease if want to
-        # plot just this part; not necessary if scatter plot defines x-y axes.
-        plt.xlim(-0.5, self.xs.max() + 0.5)
-        plt.ylim(-0.5, self.ysjig.max() + 0.5)
-
-        # Make scatter plot of outflow conduit conductivities (conductivities
-        # between internal nodes and outside.)
-        plt.scatter(self.xs, self.ysjig, c='c',
-                    s=np.dot(dotscale, self.OutflowConduits**dotpwr), zorder=2)
-
-        # Solve for flows in network. solveflow returns flows; convert flow
-        # matrix to array.
-        Flows = np.array(self.solvecolony(calcflows=True).get("Flows"))
-        # Separate inner and outer flows
-        OuterFlows = Flows[-len(self.OutflowConduits):]
-        InnerFlows = Flows[:len(self.InnerConduits)].flatten()
-        # Plot flow from nodes to outside
-        plt.scatter(self.xs, self.ysjig, s=(outflowscale*OuterFlows).tolist(),
-                    c='r', marker='*', zorder=3)
-        # Plot flows between inner nodes. First get orientation vector (not a
-        # unit vector) and its magnitude to use to determine x, y components of
-        # flow vectors.
-        Orientation_Vect = np.vstack((self.xs[self.colinds] -
-                                      self.xs[self.rowinds],
-                                      self.ysjig[self.colinds] -
-                                      self.ysjig[self.rowinds]))
-        Mag_Orientation_Vect = sum(Orientation_Vect**2)**(0.5)
-        plt.quiver((self.xs[self.rowinds] + self.xs[self.colinds])/2,
-                   (self.ysjig[self.rowinds] + self.ysjig[self.colinds])/2,
-                   InnerFlows * Orientation_Vect[0, :]/Mag_Orientation_Vect,
-                   InnerFlows * Orientation_Vect[1, :]/Mag_Orientation_Vect,
-                   color='r', pivot='mid', scale=innerflowscale, zorder=4)
+        # Solve for flows in network and plot them with conductivities.
+        networksols = self.solvecolony(calcflows=True)
+        artist = ColonyArtist(self, plt.gca(), linescale=linescale,
+                              dotscale=dotscale, outflowscale=outflowscale,
+                              innerflowscale=innerflowscale, linepwr=linepwr,
+                              dotpwr=dotpwr)
+        artist.update(networksols.get("conductivityfull"),
+                      networksols.get("Flows"))
 
         # Optional plot of adjacency matrix.
         if addspy:
             plt.figure()
             plt.spy(self.Adjacency)
 
-    def IntegrateColony(self, tmax=1):
+    def animate(self, ontogeny, filename, stride=1, flows=None, fps=20,
+                dpi=100, figsize=None, **plotkwargs):
+        """
+        Render an ontogeny (from IntegrateColony) frame by frame to a video
+        file or an image sequence.
+
+        The plot is built once (see ColonyArtist); each frame only updates
+        line widths, marker sizes and arrows. Frames are drawn with the Agg
+        backend and streamed to the writer, so memory use does not grow with
+        the number of frames (ontogeny can be memory-mapped, see
+        loadtrajectory).
+
+        Parameters :
+        ------------
+        ontogeny : list
+            (t, C) tuples as returned by IntegrateColony (colony size must
+            not change)
+        filename : str
+            Video file (written with matplotlib's ffmpeg writer) or, if it
+            contains a '%' format (e.g. 'frames/colony%05d.png'), pattern
+            for image files numbered by frame.
+        stride : int
+            Render every stride-th step of the ontogeny
+        flows : iterable
+            Optional precomputed flows (one array per rendered frame, as
+            'Flows' from solvecolony). If None, flows are solved for each
+            frame, starting from the previous frame's pressures.
+        fps : int
+            Frames per second (video only)
+        dpi : int
+            Resolution of frames
+        figsize : tuple
+            Figure size in inches (matplotlib default if None)
+        **plotkwargs :
+            Passed to ColonyArtist (linescale, dotscale, outflowscale,
+            innerflowscale, linepwr, dotpwr)
+        """
+        frames = ontogeny[::stride]
+        nconduits = self.InnerConduits.size + self.OutflowConduits.size
+        if any(len(C) != nconduits for t, C in frames):
+            raise ValueError('Ontogeny must not change colony size.')
+
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        artist = ColonyArtist(self, fig.add_subplot(1, 1, 1), **plotkwargs)
+        title = artist.ax.set_title('')
+
+        if flows is None:
+            flows = self._ontogenyflows(frames)
+
+        def drawframes():
+            for (t, C), Flows in zip(frames, flows):
+                artist.update(C, Flows)
+                title.set_text('t = {:.4g}'.format(t))
+                yield
+
+        if '%' in filename:
+            for k, _ in enumerate(drawframes()):
+                fig.savefig(filename % k, dpi=dpi)
+        else:
+            writer = FFMpegWriter(fps=fps)
+            with writer.saving(fig, filename, dpi):
+                for _ in drawframes():
+                    writer.grab_frame()
+
+    def _ontogenyflows(self, ontogeny):
+        """Generate flows for each (t, C) of ontogeny."""
+        for networksols in self._ontogenysolutions(ontogeny):
+            yield networksols.get('Flows')
+
+    def _ontogenysolutions(self, ontogeny):
+        """
+        Generate solutions (pressures and flows; see solvecolony) for each
+        (t, C) of ontogeny, using each solution's pressures as the starting
+        guess for the next.
+        """
+        Pressures = None
+        for t, C in ontogeny:
+            networksols = self.solvecolony(calcflows=True, Pressures=Pressures,
+                                           conductivityfull=np.asarray(C),
+                                           t=t)
+            Pressures = networksols.get('Pressures')
+            yield networksols
+
+    def IntegrateColony(self, tmax=1, Pressures=None, adaptivesolve=None):
         """
         ODE integration of conductivity over time as defined by self.dCdt
         odeint() seemed slow and error prone; therefore switched to ode() with
@@ -566,13 +1543,37 @@ class Colony:
 
         This variant simply sets a floor of zero on conductivities.
 
+        Frozen conduits (InnerFrozen, OutflowFrozen) are not part of the ODE
+        state: only conductivities of free conduits are integrated, and the
+        frozen ones are filled back in when solving the network. Conduit ages
+        are not part of it either: they advance with t (InnerAge + t,
+        OutflowAge + t). Time-varying inflow (see addinflow) is evaluated at
+        self.time + t; it only changes the right-hand side of each pressure
+        solve, so it adds no solves.
+
+        Each pressure solve starts from the pressures of the previous call.
+        With adaptivesolve, the pressure solves are also only as accurate as
+        the integrator needs: the relative tolerance of bicgstab is set after
+        each accepted step so that the error it causes in dC/dt over the next
+        step is a small fraction (INTEGRATOR['solvefraction']) of the local
+        error the integrator allows (rtol*|C| + atol).
+
         Parameters
         ----------
         self : colony object
         tmax : float or int
             time to integrate ODE to
-        params : dict
-            dictionary of parameters for integrator
+        Pressures : ndarray
+            Optional starting guess for the initial pressure solution (e.g.
+            pressures from an earlier solution of the same or a grown colony).
+        adaptivesolve : boolean
+            Whether to couple pressure solve tolerance to the integrator's
+            error target (default INTEGRATOR['adaptivesolve']).
+
+        Integrator settings (method, nsteps, rtol, atol, ...) are taken from
+        the module-level INTEGRATOR dictionary. Counts of right-hand side
+        evaluations, accepted steps and bicgstab iterations are stored in
+        self.IntegrationStats.
 
         Returns
         -------
@@ -582,8 +1583,25 @@ class Colony:
             C[0:self.InnerConduits.size] are innerconduits;
             C[self.Innerconduits.size:] are outflow conduits).
         """
-        params = self.solvecolony(calcdCdt=False, calcflows=False)
+        if adaptivesolve is None:
+            adaptivesolve = INTEGRATOR['adaptivesolve']
+        rtol = INTEGRATOR['rtol']
+        atol = INTEGRATOR['atol']
+        params = self.solvecolony(calcdCdt=False, calcflows=False,
+                                  Pressures=Pressures)
         C0 = params.get('conductivityfull')
+        # Only free (not frozen) conduits are integrated. Cfull holds the
+        # frozen conductivities; free ones are filled in from the ODE state.
+        free = ~np.concatenate((self.InnerFrozen, self.OutflowFrozen))
+        Cfull = C0.astype(float)
+        stats = {'rhs': 0, 'steps': 0, 'iterations': 0}
+        self.IntegrationStats = stats
+        if not free.any():
+            return [(0, Cfull.copy()), (tmax, Cfull.copy())]
+        # Tolerance for pressure solves (None: bicgstab default), and the
+        # last derivatives (to set tolerance from).
+        params['solvetol'] = None
+        params['dCdt'] = None
 
         def dCdt_simpleinputs(t, C0):
             """
@@ -591,43 +1609,78 @@ class Colony:
             and 'self' defined in enclosing scope.
 
             self.solvecolony() takes pressures saved in 'params' as a starting
-            guess when solving for pressure. Updating the starting guess with
-            each call to dCdt might speed up solution unless the ODE solver
-            overshoots too much.
+            guess when solving for pressure; the guess is updated with each
+            call that converges, and params['solvetol'] sets the solve
+            tolerance.
 
             Parameters
             ----------
-            t : n/a
-                Dummy variable required by numpy.integrate.ode syntax
+            t : float
+                Time since start of integration (advances conduit ages)
             C0 : Numpy.ndarray
-                Full list of conductivity for all edges (inner + outflow)
+                Conductivities of free (not frozen) edges (inner + outflow)
 
             Returns
             -------
-            numpy.ndarray of derivatives of conductivity with time
+            numpy.ndarray of derivatives of conductivity with time (for free
+                edges)
             """
-            C0 = np.maximum(C0, 0)
-            dCdt_vals = self.solvecolony(calcdCdt=True, calcflows=False,
-                                         Pressures=params.get('Pressures'),
-                                         IncidenceFull=params.get(
+            Cfull[free] = np.maximum(C0, 0)
+            networksols = self.solvecolony(calcdCdt=True, calcflows=False,
+                                           Pressures=params.get('Pressures'),
+                                           IncidenceFull=params.get(
                                                              'IncidenceFull'),
-                                         conductivityfull=C0).get('dCdt')
-            return dCdt_vals
+                                           conductivityfull=Cfull,
+                                           solvetol=params['solvetol'], t=t)
+            # Trial stages may overshoot (e.g. to conductivities of zero) so
+            # that the solve fails; keep the last good starting guess then.
+            if networksols.get('SolveInfo') == 0:
+                params['Pressures'] = networksols.get('Pressures')
+            params['dCdt'] = networksols.get('dCdt')[free]
+            stats['rhs'] += 1
+            stats['iterations'] += networksols.get('SolveIterations')
+            return params['dCdt']
+
+        def setsolvetol(C, h):
+            """
+            Set pressure solve tolerance so that the relative error it causes
+            in dC/dt, over a step h, is solvefraction of the local error
+            target for conductivities C.
+            """
+            dCdtnorm = np.linalg.norm(params['dCdt'])
+            if h > 0 and dCdtnorm > 0:
+                target = rtol*np.linalg.norm(C) + atol*np.sqrt(C.size)
+                params['solvetol'] = np.clip(
+                    INTEGRATOR['solvefraction']*target/(h*dCdtnorm),
+                    *INTEGRATOR['solvetolrange'])
 
         y = ode(dCdt_simpleinputs)
         # Tends to take first step too big if tmax is set high, so set initial
         # step size to try to prevent values from going below 0 on first step.
+        C0 = Cfull[free]
         dCdt0 = dCdt_simpleinputs(0, C0)
         problemvals = dCdt0 < 0
-        dt0 = 0.5 * np.min(abs(
-                         C0[problemvals]/dCdt0[problemvals]))
-        y.set_integrator('dopri5', first_step=dt0, nsteps=2000)
+        # If no conductivities are decreasing, let dopri5 choose (dt0 = 0).
+        dt0 = 0
+        if problemvals.any():
+            dt0 = 0.5 * np.min(abs(
+                             C0[problemvals]/dCdt0[problemvals]))
+        if adaptivesolve:
+            setsolvetol(C0, dt0)
+        y.set_integrator(INTEGRATOR['name'], first_step=dt0,
+                         nsteps=INTEGRATOR['nsteps'], rtol=rtol, atol=atol)
         sol = []
 
         def solout(tcurrent, ytcurrent):
-            # ytcurrent.copy() prevents ytcurrent arrays in sol from being
-            # duplicates and getting set to zero or garbage at the end.
-            sol.append((tcurrent, ytcurrent.copy()))
+            # Copying into a new full array prevents ytcurrent arrays in sol
+            # from being duplicates and getting set to zero or garbage at the
+            # end.
+            if adaptivesolve and sol:
+                setsolvetol(ytcurrent, tcurrent - sol[-1][0])
+            stats['steps'] += 1
+            Csol = Cfull.copy()
+            Csol[free] = ytcurrent
+            sol.append((tcurrent, Csol))
 
         y.set_solout(solout)
         y.set_initial_value(y=C0, t=0)
@@ -660,7 +1713,31 @@ class Colony:
 
         return self.OutflowConduits.size * (ChimOutflow/np.sum(Outflows))[0, 0]
 
-    def develop(self, tmax=1):
+    def flowintensity(self, Flows=None):
+        """
+        Flow through each inner node, to compare with flow intensity in
+        images of colonies (see FlowImage).
+
+        Flow through a node is half the summed magnitudes of all flows at
+        the node: along inner edges, to outside, and pumped in (InFlow).
+
+        Parameters :
+        ------------
+        Flows : numpy matrix
+            Flows along each edge (as from solvecolony); solved for if None
+
+        Returns :
+        ---------
+        ndarray of flow through each node (length m*n)
+        """
+        if Flows is None:
+            Flows = self.solvecolony(calcflows=True).get('Flows')
+        Flows = abs(np.asarray(Flows).ravel())
+        ninner = self.InnerConduits.size
+        return (abs(self.Incidence).transpose().dot(Flows[:ninner]) +
+                Flows[ninner:] + abs(self.inflowat())) / 2
+
+    def develop(self, tmax=1, cache=None):
         """
         Create new colony object with conductivities updated by integration
         of ODE
@@ -669,19 +1746,832 @@ class Colony:
         ------------
         tmax : float
             Time to integrate over
+        cache : DevelopCache
+            Optional on-disk cache of results: if this experiment (same
+            colony state, dC/dt law and parameters, tmax and integrator
+            settings) was developed before, the stored result is returned.
 
         Returns :
         ---------
-        newcolony : colony object with updated conductivities
+        newcolony : colony object with updated conductivities (and time and
+            ages advanced by tmax)
         """
+        if cache is not None:
+            return cache.develop(self, tmax)
         ontogeny = self.IntegrateColony(tmax)
-        newcolony = copy.deepcopy(self)
+        newcolony = self.copy()
         newcolony.InnerConduits = np.copy(ontogeny[-1][1]
                                           )[0:len(self.InnerConduits)]
         newcolony.OutflowConduits = np.copy(ontogeny[-1][1]
                                             )[len(self.InnerConduits):]
+        newcolony.InnerAge = self.InnerAge + tmax
+        newcolony.OutflowAge = self.OutflowAge + tmax
+        newcolony.time = self.time + tmax
+        return newcolony
+
+    def coarsen(self, factor=2):
+        """
+        Create coarser colony, with blocks of factor x factor zooids
+        combined into one zooid, to develop quickly as an initial condition
+        for this colony (see developmultires and prolong).
+
+        Each coarse node combines the fine nodes of the same parity in its
+        block. Outflow conductivities and inflows (and inflow profiles) of
+        the block are summed (outlets in parallel). Inner conductivities are
+        carried over unchanged (a sheet of conduits has the same conductance
+        at any resolution): coarse edges get the mean of the conductivities
+        of fine edges incident to their end nodes. dC/dt parameters with the
+        form used by dCdt_default are rescaled so that S and dC/dt match
+        between resolutions for a uniform colony (see _coarsenparams).
+        Conduits to outside are frozen if any fine conduit in their block is
+        frozen; inner edges are frozen if fine frozen edges touch both ends.
+        Conduit ages are averaged like conductivities (means, not sums).
+
+        Parameters
+        ----------
+        factor : int
+            Number of fine zooid rows (and columns) per coarse zooid
+
+        Returns
+        -------
+        coarse colony object
+        """
+        nc = 2 * -(-(self.n // 2) // factor)  # Round up to whole zooids
+        mc = -(-self.m // factor)
+        coarse = Colony(nz=nc // 2, mz=mc, dCdt=self.dCdt,
+                        dCdt_in_params=_coarsenparams(
+                            self.dCdt_in_params, factor, 'inner'),
+                        dCdt_out_params=_coarsenparams(
+                            self.dCdt_out_params, factor, 'outer'))
+        coarsenodes = self._coarsenodes(factor)
+        ncoarse = nc * mc
+
+        coarse.OutflowConduits = np.bincount(
+            coarsenodes, self.OutflowConduits, ncoarse)
+        coarse.InFlow = np.bincount(coarsenodes, self.InFlow, ncoarse)
+        coarse.InFlowProfiles = np.array(
+            [np.bincount(coarsenodes, profile, ncoarse)
+             for profile in self.InFlowProfiles]).reshape(-1, ncoarse)
+        coarse.InFlowGains = self.InFlowGains
+        coarse.time = self.time
+        coarse.OutflowFrozen = np.bincount(
+            coarsenodes, self.OutflowFrozen, ncoarse) > 0
+        counts = np.maximum(np.bincount(coarsenodes, None, ncoarse), 1)
+        coarse.OutflowAge = np.bincount(
+            coarsenodes, self.OutflowAge, ncoarse) / counts
+
+        # Mean conductivity of fine inner edges incident to each coarse node's
+        # block, assigned to coarse edges as the mean of their two ends.
+        nodefield = self._nodemeans(self.InnerConduits)
+        blockfield = np.bincount(coarsenodes, nodefield, ncoarse) / counts
+        coarse.InnerConduits = (blockfield[coarse.rowinds] +
+                                blockfield[coarse.colinds]) / 2
+        # Ages are averaged in the same way.
+        blockages = np.bincount(coarsenodes, self._nodemeans(self.InnerAge),
+                                ncoarse) / counts
+        coarse.InnerAge = (blockages[coarse.rowinds] +
+                           blockages[coarse.colinds]) / 2
+        frozennodes = np.zeros(self.m*self.n, dtype=bool)
+        frozennodes[self.rowinds[self.InnerFrozen]] = True
+        frozennodes[self.colinds[self.InnerFrozen]] = True
+        frozenblocks = np.bincount(coarsenodes, frozennodes, ncoarse) > 0
+        coarse.InnerFrozen = (frozenblocks[coarse.rowinds] &
+                              frozenblocks[coarse.colinds])
+        return coarse
+
+    def prolong(self, coarse, factor=2):
+        """
+        Set conductivities of this colony from a coarse colony made by
+        coarsen(factor) (and usually developed), as the inverse of coarsen.
+
+        The change made to the coarse colony (ratio of its conductivities to
+        those of coarsen(factor) of this colony) is carried over, rather
+        than the coarse conductivities themselves, so structure within
+        blocks (e.g. a single seeded chimney) is kept, and prolonging an
+        undeveloped coarse colony leaves this colony unchanged. Outflow
+        conductivities of each block are scaled by the ratio for their
+        coarse node. Inner conductivities are scaled by a smooth ratio: the
+        mean, over the two end nodes, of the mean ratio of the coarse edges
+        at each node. Conduits with conductivity of zero stay at zero, and
+        frozen conduits keep their conductivities. Ages are not changed.
+
+        Parameters
+        ----------
+        coarse : colony object
+            Coarse colony (from coarsen(factor) of this colony)
+        factor : int
+            Factor used to make coarse
+        """
+        initial = self.coarsen(factor)
+        coarsenodes = self._coarsenodes(factor)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            outerratio = np.where(
+                initial.OutflowConduits > 0,
+                coarse.OutflowConduits / initial.OutflowConduits, 1)
+            innerratio = np.where(
+                initial.InnerConduits > 0,
+                coarse.InnerConduits / initial.InnerConduits, 1)
+        OutflowConduits = self.OutflowConduits * outerratio[coarsenodes]
+        noderatio = coarse._nodemeans(innerratio)[coarsenodes]
+        InnerConduits = self.InnerConduits * (noderatio[self.rowinds] +
+                                              noderatio[self.colinds]) / 2
+
+        OutflowConduits[self.OutflowFrozen] = self.OutflowConduits[
+            self.OutflowFrozen]
+        InnerConduits[self.InnerFrozen] = self.InnerConduits[self.InnerFrozen]
+        self.OutflowConduits = OutflowConduits
+        self.InnerConduits = InnerConduits
+
+    def developmultires(self, tmax=1, coarsetmax=None, factor=2, levels=1):
+        """
+        Create new colony object developed from an initial condition found
+        on a coarser lattice.
+
+        A colony coarsened by factor (see coarsen) is developed first, its
+        conductivity pattern is prolonged onto this lattice (see prolong),
+        and only a short fine-scale integration follows.
+
+        This helps when symmetry breaking is slow, i.e. the colony starts
+        near uniform (e.g. small noise on uniform conductivities) and
+        develop spends most of its time before a pattern emerges: the coarse
+        colony breaks symmetry cheaply and the fine integration starts from
+        a pattern. It does not help for colonies that are already patterned
+        (e.g. seeded chimneys): their fine ODE is stiff, so the short fine
+        integration costs about as much as developing directly, and the
+        prolonged pattern is coarser (weaker chimneys) than develop's.
+
+        Parameters :
+        ------------
+        tmax : float
+            Time to integrate the fine colony over (after prolongation)
+        coarsetmax : float
+            Time to integrate the coarsest colony over (default tmax);
+            intermediate levels (levels > 1) are integrated over tmax after
+            prolongation, like this colony
+        factor : int
+            Coarsening factor (zooid rows and columns per coarse zooid)
+        levels : int
+            Number of coarsening levels (coarse colony is itself developed
+            with developmultires if levels > 1)
+
+        Returns :
+        ---------
+        newcolony : colony object with updated conductivities
+        """
+        if coarsetmax is None:
+            coarsetmax = tmax
+        coarse = self.coarsen(factor)
+        if levels > 1:
+            coarse = coarse.developmultires(tmax, coarsetmax, factor,
+                                            levels - 1)
+        else:
+            coarse = coarse.develop(coarsetmax)
+        newcolony = self.copy()
+        newcolony.prolong(coarse, factor)
+        return newcolony.develop(tmax)
+
+    def _coarsenodes(self, factor):
+        """
+        Index of the coarse node (in coarsen(factor)) containing each node.
+        """
+        nc = 2 * -(-(self.n // 2) // factor)
+        nodes = np.arange(self.m*self.n)
+        columns = nodes % self.n
+        return ((self.ys // factor) * nc +
+                (columns // 2 // factor) * 2 + columns % 2)
+
+    def _nodemeans(self, values):
+        """Mean of values of inner edges incident to each node."""
+        nnodes = self.m*self.n
+        sums = (np.bincount(self.rowinds, values, nnodes) +
+                np.bincount(self.colinds, values, nnodes))
+        counts = (np.bincount(self.rowinds, None, nnodes) +
+                  np.bincount(self.colinds, None, nnodes))
+        return sums / np.maximum(counts, 1)
+
+    def growdevelop(self, tmax=1, growthinterval=1, rows=1, **growkwargs):
+        """
+        Create new colony object that alternately develops (integration of
+        ODE) and grows, adding zooid rows at the distal edge every
+        growthinterval until tmax.
+
+        The grown colony is extended in place between integration intervals,
+        so conductivities are carried over, sparse matrices are extended
+        rather than rebuilt, and pressures from the previous interval are
+        used as the starting guess for the next one.
+
+        Parameters :
+        ------------
+        tmax : float
+            Time to integrate over
+        growthinterval : float
+            Time between additions of zooid rows
+        rows : int
+            Number of zooid rows added at each growth step
+        **growkwargs :
+            Passed to grow (InnerConductivity, OutflowConductivity,
+            Incurrents)
+
+        Returns :
+        ---------
+        newcolony : colony object with updated conductivities and size
+        """
+        newcolony = self.copy()
+        Pressures = None
+        # Count intervals once (not by summing float dt), so rounding cannot
+        # add a row and an interval of ~1e-16 at the end.
+        nintervals = max(int(np.ceil(tmax/growthinterval - 1e-9)), 1)
+        t = 0
+        for i in range(nintervals):
+            end = tmax if i == nintervals - 1 else (i+1)*growthinterval
+            dt = end - t
+            Pressures = newcolony.solvecolony(
+                Pressures=Pressures).get('Pressures')
+            ontogeny = newcolony.IntegrateColony(dt, Pressures=Pressures)
+            newcolony.InnerConduits = np.copy(ontogeny[-1][1]
+                                              )[0:len(newcolony.InnerConduits)]
+            newcolony.OutflowConduits = np.copy(ontogeny[-1][1]
+                                                )[len(newcolony.InnerConduits):]
+            newcolony.InnerAge = newcolony.InnerAge + dt
+            newcolony.OutflowAge = newcolony.OutflowAge + dt
+            newcolony.time = self.time + end
+            t = end
+            if i < nintervals - 1:
+                newcolony.grow(rows, **growkwargs)
+                # Starting guess for pressures in new rows: pressures of the
+                # old distal row.
+                Pressures = np.concatenate((
+                    Pressures, np.tile(Pressures[-newcolony.n:], rows)))
         return newcolony
 
+    def save(self, path, ontogeny=None, solutions=False):
+        """
+        Save colony (and optionally an ontogeny from IntegrateColony) in a
+        compact on-disk format that can be memory-mapped when loaded.
+
+        path is a directory holding 'colony.json' (lattice size (m, n), the
+        dC/dt law by name plus parameters, time and inflow schedules) and one
+        .npy file per array (conductivities, inflow and inflow profiles,
+        frozen masks, ages). Topology is not stored: it is rebuilt from
+        (m, n). If ontogeny is given, 'times.npy', 'offsets.npy' and
+        'states.npy' store it as one flat array (states may change length if
+        the colony grew).
+
+        With solutions, pressures and flows are saved too ('Pressures.npy',
+        'Flows.npy'; and for an ontogeny 'statepressures.npy' with
+        'pressureoffsets.npy', and 'stateflows.npy' with the same offsets as
+        the states), so saved results can be analysed (e.g. with
+        flowintensity, OutflowFraction or FlowImage.rank) without solving
+        the network again. This costs one solve per state saved.
+
+        Parameters :
+        ------------
+        path : str
+            Directory to save to (created if needed)
+        ontogeny : list
+            Optional list of (t, C) tuples as returned by IntegrateColony
+            (for solutions, states must all be of this colony's size)
+        solutions : boolean, default is False
+            True : also save pressures and flows
+        """
+        os.makedirs(path, exist_ok=True)
+        meta = {'format': SNAPSHOT_FORMAT, 'm': int(self.m), 'n': int(self.n),
+                'dCdt': _dCdtname(self.dCdt),
+                'dCdt_in_params': self.dCdt_in_params,
+                'dCdt_out_params': self.dCdt_out_params,
+                'time': float(self.time),
+                'InFlowGains': [[gain, dict(params)]
+                                for gain, params in self.InFlowGains]}
+        arrays = {name: getattr(self, name) for name in _SNAPSHOT_ARRAYS}
+        if solutions:
+            networksols = self.solvecolony(calcflows=True)
+            arrays['Pressures'] = networksols['Pressures']
+            arrays['Flows'] = np.asarray(networksols['Flows']).ravel()
+        if ontogeny is not None:
+            arrays['times'] = np.array([t for t, C in ontogeny], dtype=float)
+            arrays['offsets'] = np.concatenate((
+                [0], np.cumsum([len(C) for t, C in ontogeny])))
+            arrays['states'] = np.concatenate([C for t, C in ontogeny])
+            if solutions:
+                sols = list(self._ontogenysolutions(ontogeny))
+                arrays['statepressures'] = np.concatenate(
+                    [networksols['Pressures'] for networksols in sols])
+                arrays['pressureoffsets'] = np.concatenate((
+                    [0], np.cumsum([len(networksols['Pressures'])
+                                    for networksols in sols])))
+                arrays['stateflows'] = np.concatenate(
+                    [np.asarray(networksols['Flows']).ravel()
+                     for networksols in sols])
+        for name, values in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), values)
+        # Don't leave older optional arrays (ontogeny, solutions) behind with
+        # this colony.
+        for name in _SNAPSHOT_OPTIONAL:
+            if name not in arrays and os.path.exists(
+                    os.path.join(path, name + '.npy')):
+                os.remove(os.path.join(path, name + '.npy'))
+        # Metadata is written last, so a directory with colony.json is
+        # complete.
+        with open(os.path.join(path, 'colony.json'), 'w') as f:
+            json.dump(meta, f, default=float)
+
+
+class ColonyArtist:
+    """
+    Matplotlib artists for plotting a colony: lines for edges between inner
+    nodes (width scaled to conductivity), circles for inner nodes (scaled by
+    conductivity to outside), stars for flows to outside and arrows (quiver)
+    for flows between inner nodes.
+
+    The artists are built once for a colony's topology; update then only
+    changes line widths, marker sizes and arrow components, so many
+    conductivity/flow states (e.g. frames of an ontogeny) can be drawn
+    cheaply. Used by Colony.colonyplot and Colony.animate.
+    """
+    def __init__(self, colony, ax, linescale=1, dotscale=10, outflowscale=10,
+                 innerflowscale=40, linepwr=1, dotpwr=1):
+        """
+        Create artists on axes ax (see Colony.colonyplot for parameters).
+        Sizes are set by update.
+        """
+        self.ax = ax
+        self.linescale = linescale
+        self.dotscale = dotscale
+        self.outflowscale = outflowscale
+        self.linepwr = linepwr
+        self.dotpwr = dotpwr
+        self.ninner = colony.InnerConduits.size
+        xs = colony.xs
+        ysjig = colony.ysjig
+        rowinds = colony.rowinds
+        colinds = colony.colinds
+
+        # Plot lines for edges among internal nodes; line width: conductivity
+        # Convert coordinates of node-pairs to x-y coordinates of line
+        # segments, and create matplotlib.collections.LineCollection object
+        # from segments.
+        segments = np.stack((np.vstack((xs[rowinds], xs[colinds])),
+                             np.vstack((ysjig[rowinds], ysjig[colinds])))
+                            ).transpose()
+        self.edges = LineCollection(segments, zorder=1)
+        ax.add_collection(self.edges)
+        # Set xlim & ylim since the line collection doesn't set axes limits.
+        ax.set_xlim(-0.5, xs.max() + 0.5)
+        ax.set_ylim(-0.5, ysjig.max() + 0.5)
+
+        # Scatter plot of outflow conduit conductivities (conductivities
+        # between internal nodes and outside), and of flow from nodes to
+        # outside.
+        self.outerconduits = ax.scatter(xs, ysjig, c='c', zorder=2)
+        self.outerflows = ax.scatter(xs, ysjig, c='r', marker='*', zorder=3)
+
+        # Plot flows between inner nodes. Orientation vector (not a unit
+        # vector) and its magnitude determine x, y components of flow vectors.
+        Orientation_Vect = np.vstack((xs[colinds] - xs[rowinds],
+                                      ysjig[colinds] - ysjig[rowinds]))
+        Mag_Orientation_Vect = sum(Orientation_Vect**2)**(0.5)
+        self.orientation = Orientation_Vect/Mag_Orientation_Vect
+        self.innerflows = ax.quiver((xs[rowinds] + xs[colinds])/2,
+                                    (ysjig[rowinds] + ysjig[colinds])/2,
+                                    np.zeros(len(rowinds)),
+                                    np.zeros(len(rowinds)),
+                                    color='r', pivot='mid',
+                                    scale=innerflowscale, zorder=4)
+
+    def update(self, conductivityfull, Flows):
+        """
+        Update artists for new conductivities and flows.
+
+        Parameters
+        ----------
+        conductivityfull : ndarray
+            inner then outflow conductivities (as in solvecolony or
+            IntegrateColony)
+        Flows : ndarray or matrix
+            flows along inner then outflow conduits (as in solvecolony)
+
+        Returns
+        -------
+        tuple of updated artists
+        """
+        conductivityfull = np.asarray(conductivityfull)
+        Flows = np.asarray(Flows).flatten()
+        self.edges.set_linewidths(
+            np.dot(self.linescale,
+                   conductivityfull[:self.ninner]**self.linepwr))
+        self.outerconduits.set_sizes(
+            np.dot(self.dotscale,
+                   conductivityfull[self.ninner:]**self.dotpwr))
+        self.outerflows.set_sizes(self.outflowscale*Flows[self.ninner:])
+        InnerFlows = Flows[:self.ninner]
+        self.innerflows.set_UVC(InnerFlows * self.orientation[0, :],
+                                InnerFlows * self.orientation[1, :])
+        return self.edges, self.outerconduits, self.outerflows, self.innerflows
+
+
+# Settings of the ODE integrator used by IntegrateColony: method, maximum
+# steps, and tolerances; with adaptivesolve, pressure solve tolerance is
+# solvefraction of the local error target (limited to solvetolrange).
+INTEGRATOR = {'name': 'dopri5', 'nsteps': 2000, 'rtol': 1e-6, 'atol': 1e-12,
+              'adaptivesolve': False, 'solvefraction': 0.1,
+              'solvetolrange': (1e-10, 1e-3)}
+
+# Format version of saved colonies, and arrays saved for each colony.
+SNAPSHOT_FORMAT = 1
+_SNAPSHOT_ARRAYS = ('InnerConduits', 'OutflowConduits', 'InFlow',
+                    'InnerFrozen', 'OutflowFrozen', 'InnerAge', 'OutflowAge',
+                    'InFlowProfiles')
+# Arrays saved only with an ontogeny or with solutions (see Colony.save).
+_SNAPSHOT_OPTIONAL = ('Pressures', 'Flows', 'times', 'offsets', 'states',
+                      'statepressures', 'pressureoffsets', 'stateflows')
+
+
+def loadsnapshot(path, mmap_mode='r'):
+    """
+    Load a saved colony as a dictionary of arrays, without building a Colony.
+
+    Arrays are memory-mapped (mmap_mode as for numpy.load), so loading many
+    saved results for analysis reads only the data actually used.
+
+    Parameters :
+    ------------
+    path : str
+        Directory written by Colony.save
+    mmap_mode : str or None
+        'r' (read-only), 'c' (copy-on-write) or None (read into memory)
+
+    Returns :
+    ---------
+    dictionary : metadata from colony.json ('m', 'n', 'dCdt',
+        'dCdt_in_params', 'dCdt_out_params', 'time', 'InFlowGains') plus
+        one array per saved attribute, 'times', 'offsets', 'states' if an
+        ontogeny was saved, and 'Pressures', 'Flows' (plus 'statepressures',
+        'pressureoffsets', 'stateflows' for an ontogeny) if solutions were
+        saved
+    """
+    with open(os.path.join(path, 'colony.json')) as f:
+        snapshot = json.load(f)
+    if snapshot.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError('Unsupported colony snapshot format: ' +
+                         repr(snapshot.get('format')))
+    names = _SNAPSHOT_ARRAYS + tuple(
+        name for name in _SNAPSHOT_OPTIONAL
+        if os.path.exists(os.path.join(path, name + '.npy')))
+    for name in names:
+        snapshot[name] = np.load(os.path.join(path, name + '.npy'),
+                                 mmap_mode=mmap_mode)
+    snapshot['InFlowGains'] = _stategains(snapshot['InFlowGains'])
+    return snapshot
+
+
+def loadcolony(path, mmap_mode='r'):
+    """
+    Load a colony saved by Colony.save.
+
+    Conductivity, inflow and mask arrays are memory-mapped read-only by
+    default (colony state arrays are read-only anyway; changing them
+    replaces them, so the saved files are never changed).
+
+    Parameters :
+    ------------
+    path : str
+        Directory written by Colony.save
+    mmap_mode : str or None
+        As for numpy.load
+
+    Returns :
+    ---------
+    Colony object
+    """
+    snapshot = loadsnapshot(path, mmap_mode=mmap_mode)
+    colony = Colony(nz=snapshot['n'] // 2, mz=snapshot['m'],
+                    dCdt=dCdt_laws[snapshot['dCdt']],
+                    dCdt_in_params=snapshot['dCdt_in_params'],
+                    dCdt_out_params=snapshot['dCdt_out_params'])
+    for name in _SNAPSHOT_ARRAYS + ('time', 'InFlowGains'):
+        setattr(colony, name, snapshot[name])
+    if 'Pressures' in snapshot:
+        # Saved pressures are the colony's solution (see solvecolony).
+        colony._solution = (colony.version, _readonly(snapshot['Pressures']))
+    return colony
+
+
+def loadtrajectory(path, mmap_mode='r', solutions=False):
+    """
+    Load an ontogeny saved with Colony.save.
+
+    Parameters :
+    ------------
+    solutions : boolean, default is False
+        True : also return the saved pressures and flows of each state
+        (saved with Colony.save(..., solutions=True))
+
+    Returns :
+    ---------
+    List : (t, C) tuples as returned by IntegrateColony, or (t, C,
+        Pressures, Flows) tuples with solutions; each array is a view into
+        the (memory-mapped) saved arrays, so nothing is copied.
+    """
+    snapshot = loadsnapshot(path, mmap_mode=mmap_mode)
+    offsets = snapshot['offsets']
+    states = snapshot['states']
+    if not solutions:
+        return [(t, states[offsets[k]:offsets[k+1]])
+                for k, t in enumerate(snapshot['times'])]
+    poffsets = snapshot['pressureoffsets']
+    return [(t, states[offsets[k]:offsets[k+1]],
+             snapshot['statepressures'][poffsets[k]:poffsets[k+1]],
+             snapshot['stateflows'][offsets[k]:offsets[k+1]])
+            for k, t in enumerate(snapshot['times'])]
+
+
+class DevelopCache:
+    """
+    The DevelopCache class stores results of Colony.develop on local disk,
+    keyed by a hash of the experiment, so repeated experiments (within or
+    across processes and sessions) are loaded instead of integrated again.
+
+    The key (see key) covers the lattice size, conductivities, inflow (and
+    its schedules), frozen masks, ages, time, dC/dt law (by registered name)
+    and parameters, tmax and the integrator settings. Results are saved
+    with Colony.save, one directory per key. When the cache grows past
+    maxbytes, the least recently used results are deleted. The cache size
+    is scanned once when the cache is opened and then kept as a running
+    total, so the directory is only scanned again when that total goes over
+    maxbytes (results stored by other processes are counted at that scan).
+    """
+    # Bump to invalidate results cached by older versions of the model.
+    VERSION = 1
+
+    def __init__(self, path=None, maxbytes=2**30):
+        """
+        Parameters
+        ----------
+        path : str
+            Cache directory (default: ~/.bryozoan_cache)
+        maxbytes : int
+            Size limit of the cache in bytes
+        """
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.bryozoan_cache')
+        self.path = path
+        self.maxbytes = maxbytes
+        os.makedirs(path, exist_ok=True)
+        # Running total of cache size (bytes); see evict.
+        self.size = sum(size for mtime, size, entry in self._entries())
+
+    def key(self, colony, tmax):
+        """
+        Hash (hex string) identifying the experiment colony.develop(tmax).
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(
+            {'version': self.VERSION, 'm': int(colony.m),
+             'n': int(colony.n), 'dCdt': _dCdtname(colony.dCdt),
+             'dCdt_in_params': colony.dCdt_in_params,
+             'dCdt_out_params': colony.dCdt_out_params,
+             'tmax': float(tmax), 'integrator': INTEGRATOR,
+             'time': float(colony.time),
+             'InFlowGains': [[gain, dict(params)]
+                             for gain, params in colony.InFlowGains]},
+            sort_keys=True, default=float).encode())
+        for name in _SNAPSHOT_ARRAYS:
+            values = getattr(colony, name)
+            dtype = bool if values.dtype == bool else '<f8'
+            digest.update(np.ascontiguousarray(values, dtype=dtype).data)
+        return digest.hexdigest()
+
+    def develop(self, colony, tmax):
+        """
+        colony.develop(tmax), loaded from the cache if available (otherwise
+        developed and stored).
+        """
+        entry = os.path.join(self.path, self.key(colony, tmax))
+        if os.path.exists(os.path.join(entry, 'colony.json')):
+            # Mark as recently used.
+            os.utime(entry)
+            return loadcolony(entry, mmap_mode=None)
+        newcolony = colony.develop(tmax)
+        # Save to a temporary directory and rename, so other processes never
+        # see a partly written result.
+        temppath = tempfile.mkdtemp(dir=self.path, prefix='.tmp')
+        # Keep its pressures too, so loaded results need not be solved again.
+        newcolony.save(temppath, solutions=True)
+        size = self._entrysize(temppath)
+        try:
+            os.rename(temppath, entry)
+            self.size += size
+        except OSError:
+            # Another process stored the same result first.
+            shutil.rmtree(temppath, ignore_errors=True)
+        if self.size > self.maxbytes:
+            self.evict()
+        return newcolony
+
+    def evict(self):
+        """
+        Delete least recently used results until the cache is no larger than
+        maxbytes. Scans the cache directory, and resets the running total of
+        its size.
+        """
+        entries = self._entries()
+        total = sum(size for mtime, size, entry in entries)
+        for mtime, size, entry in sorted(entries):
+            if total <= self.maxbytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+        self.size = total
+
+    def _entries(self):
+        """(modification time, size, path) of each stored result."""
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            entries.append((os.path.getmtime(entry), self._entrysize(entry),
+                            entry))
+        return entries
+
+    @staticmethod
+    def _entrysize(entry):
+        """Size (bytes) of the files of a stored result."""
+        return sum(os.path.getsize(os.path.join(entry, filename))
+                   for filename in os.listdir(entry))
+
+    def clear(self):
+        """Delete all cached results."""
+        for name in os.listdir(self.path):
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        self.size = 0
+
+
+# Processed flow images distributed with this script (see NotesOnImages.txt),
+# by name. Both are 6.4 mm wide, but FlowImage stretches them over the
+# lattice, so their physical scale is not used.
+FLOW_IMAGES = {
+    'Colony10PlanviewDay0':
+        'Colony10PlanviewDay0_MaxFrameDifsAsRainbowPlusMedianFrames.jpg',
+    'Colony03NewChimFrontDay4':
+        'Colony03NewChimFrontDay4_MaxFrameDifsAsRainbowPlusMedianFrames'
+        '_cropped.jpg'}
+
+
+class FlowImage:
+    """
+    The FlowImage class holds flow intensity from a processed flow image
+    (maximum frame differences merged as RGB channels, plus the grey median
+    frame; see NotesOnImages.txt) and compares it with flows of colonies.
+
+    Moving particles differ between the three frame-difference channels,
+    whereas the median frame (lophophores, background) is grey, so flow
+    intensity is taken as the chroma of each pixel (max minus min of RGB).
+
+    The whole image is stretched to fit the colony lattice unrolled from
+    the cylinder (x position xs modulo n, y position ysjig; distal edge at
+    the top), whatever the colony size, and averaged over the block of
+    pixels around each node. Images are
+    loaded once (FlowImage.get), and block averages are computed once per
+    lattice size, so scoring many colonies only costs one correlation per
+    colony (see score and rank).
+    """
+    # Loaded images, by path.
+    _loaded = {}
+
+    def __init__(self, path):
+        """
+        Load image. Usually called through FlowImage.get.
+
+        Parameters
+        ----------
+        path : str
+            Image file
+        """
+        rgb = np.asarray(plt.imread(path), dtype=float)[..., :3]
+        if rgb.max() > 1:
+            rgb = rgb / 255
+        self.path = path
+        self.intensity = _readonly(rgb.max(axis=2) - rgb.min(axis=2))
+        # Block averages of intensity, by lattice size (n, m).
+        self._samples = {}
+
+    @classmethod
+    def get(cls, name):
+        """
+        Flow image by name (a key of FLOW_IMAGES) or path, loaded only the
+        first time it is requested.
+        """
+        if name in FLOW_IMAGES:
+            name = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                FLOW_IMAGES[name])
+        path = os.path.abspath(name)
+        if path not in cls._loaded:
+            cls._loaded[path] = cls(path)
+        return cls._loaded[path]
+
+    def sample(self, n, m):
+        """
+        Mean image intensity around each node of a lattice with m rows of n
+        nodes (as for Colony.n, Colony.m).
+
+        Each pixel is assigned to a node in its column of nodes (one node
+        spacing wide): the node whose y position (ysjig) is nearest. Nodes
+        assigned no pixel centre (lattice finer than the image) take the
+        pixel at the node.
+
+        Returns
+        -------
+        ndarray (read-only) of intensities, length m*n
+        """
+        if (n, m) not in self._samples:
+            topology = ColonyTopology.get(n, m)
+            height, width = self.intensity.shape
+            # Pixel centres in lattice units (x across the unrolled
+            # cylinder, y up from the proximal edge).
+            x = (np.arange(width) + 0.5) * n / width
+            y = (height - np.arange(height) - 0.5) * m / height
+            columns = np.floor(x).astype(int)
+            # xs = node column + row, so the node of row r in a column of
+            # nodes has node column (x - r) modulo n, whose parity sets its
+            # ysjig offset. Node centres (ysjig + 0.5) lie in [r + 0.5,
+            # r + 0.7], so the nearest is in row floor(y - 0.7) or the one
+            # above.
+            lower = np.floor(y[:, np.newaxis] - 0.7).astype(int)
+            candidates = [np.clip(lower + k, 0, m - 1) for k in (0, 1)]
+            distances = [abs(y[:, np.newaxis] - 0.5 - rows -
+                             0.2 * ((columns - rows) % n % 2))
+                         for rows in candidates]
+            rows = np.where(distances[1] < distances[0], candidates[1],
+                            candidates[0])
+            nodes = rows * n + (columns - rows) % n
+            counts = np.bincount(nodes.ravel(), None, m*n)
+            samples = np.bincount(nodes.ravel(), self.intensity.ravel(),
+                                  m*n) / np.maximum(counts, 1)
+            empty = counts == 0
+            if empty.any():
+                nodex = (topology.xs[empty] % n + 0.5) * width / n
+                nodey = (m - topology.ysjig[empty] - 0.5) * height / m
+                samples[empty] = self.intensity[
+                    np.clip(nodey.astype(int), 0, height - 1),
+                    np.clip(nodex.astype(int), 0, width - 1)]
+            self._samples[(n, m)] = _readonly(samples)
+        return self._samples[(n, m)]
+
+    def score(self, nodeflows, n, m):
+        """
+        Correlation (Pearson) between image intensity and flow through the
+        nodes of one or many colonies of the same size.
+
+        Parameters
+        ----------
+        nodeflows : array
+            Flow through each node (see Colony.flowintensity), length m*n,
+            or k-by-(m*n) array with one row per colony
+        n, m : int
+            Lattice size (Colony.n, Colony.m)
+
+        Returns
+        -------
+        float, or ndarray of k correlations (nan for uniform flows)
+        """
+        nodeflows = np.asarray(nodeflows, dtype=float)
+        samples = self.sample(n, m)
+        samples = samples - samples.mean()
+        flows = np.atleast_2d(nodeflows)
+        flows = flows - flows.mean(axis=1)[:, np.newaxis]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = flows.dot(samples) / (np.linalg.norm(flows, axis=1) *
+                                           np.linalg.norm(samples))
+        return scores[0] if nodeflows.ndim == 1 else scores
+
+    def rank(self, colonies):
+        """
+        Rank colonies (e.g. developed over a parameter sweep) by how well
+        their flows match the image.
+
+        Colonies are scored in groups of the same lattice size (see score).
+
+        Parameters
+        ----------
+        colonies : list
+            colony objects
+
+        Returns
+        -------
+        tuple : indices of colonies from best to worst match (colonies with
+            uniform flows last), and array of scores (in the original order)
+        """
+        scores = np.full(len(colonies), np.nan)
+        sizes = {}
+        for k, colony in enumerate(colonies):
+            sizes.setdefault((colony.n, colony.m), []).append(k)
+        for (n, m), inds in sizes.items():
+            scores[inds] = self.score(
+                [colonies[k].flowintensity() for k in inds], n, m)
+        return np.argsort(-scores, kind='stable'), scores
+
+
 # For fast search of parameter space via one step differentiation, fastest to
 # much faster to add if statement that calculate pressures from answer.
 
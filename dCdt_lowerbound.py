@@ -6,7 +6,7 @@ dCdt function with lower bound on C for use by Colony class.
 
 @author: Michelangelo
 """
-from Bryozoan import Colony
+from Bryozoan import Colony, registerdCdt
 import numpy as np
 import copy
 import time
@@ -88,6 +88,10 @@ def dCdt_lb(Cs, dPs, params):
     dCdt[(Cflr < params.get('c0')) & (dCdt < 0)] = 0
     return dCdt, S
 
+
+# Register dCdt_lb so colonies using it can be saved with Colony.save.
+registerdCdt(dCdt_lb)
+
 # It seems hard to figure out what's going on in this form:
 # may be easier to understand model in terms of C and flow.
 
@@ -99,7 +103,7 @@ c1 = Colony(nz=7, mz=6, OutflowConductivity=0.001, dCdt=dCdt_lb,
                                      'c0': 0.0009})
 # Set a central outflow conduit (edge) to have higher conductivity
 #c1.setouterconductivities([76], [0.02])
-c1.setouterconductivities(list(range(70,84)), [1]*14)
+c1.setouterconductivities(np.arange(70, 84), 1)
 c1.setouterconductivities([76], [2])
 
 # Solve dif. eqs. for c1 and put result in c2.